@@ -0,0 +1,11 @@
+"""Allow running the application with `python -m SpeedAutoClicker`"""
+
+import os
+import sys
+
+# The modules import each other as top-level scripts, like main.py does
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from main import main
+
+main()
@@ -2,261 +2,1148 @@ import time
 import threading
 import json
 import os
-from pynput.mouse import Button, Controller as MouseController
-from pynput.keyboard import Key, KeyCode, Listener as KeyboardListener
-import Quartz
+import copy
+from backends import BACKENDS, BackendUnavailable, CursorTracker, create_backend
+from timing import PrecisionWaiter, ClickScheduler
+from telemetry import ClickTelemetry, LatencyHistogram
+from profiling import PROFILERS, PhaseCounters, InstrumentedBackend, InstrumentedWaiter, run_profiled
+from persistence import ConfigWriter, write_atomic
+from plan import ClickPlan
+from jitter import JitterSource
+from targets import TargetCycle
+from trigger import ColorCondition, PixelTrigger, create_frame_source
+from hotkeys import HotkeyMatcher, parse_spec
+from streams import ClickStream, StreamMultiplexer
+from macros import compile_macro, compile_macros, play_timeline
+from recording import InputRecorder, Recording, replay
+from history import SessionHistory
+from profiles import PROFILE_KEYS, apply_profile, base_settings, compile_profiles, profile_overlay
+
+try:
+    from pynput.keyboard import Listener as KeyboardListener
+except ImportError:
+    # No keyboard hooks on this machine (e.g. headless Linux build boxes)
+    KeyboardListener = None
+
+# Default configuration
+DEFAULT_CONFIG = {
+    "click_interval_ms": 100.0,
+    "duty_cycle_percent": 50.0,
+    "mouse_button": "left",
+    "activation_mode": "toggle",
+    "hotkey": "f6",
+    "hotkey_bindings": {},
+    "streams": [],
+    "macros": {},
+    "profiles": {},
+    "active_profile": "",
+    "profile_base": {},
+    "backend": "auto",
+    "save_delay_ms": 250.0,
+    "position_mode": "track",
+    "burst_size": 1,
+    "targets": {
+        "enabled": False,
+        "mode": "round_robin",
+        "points": [],
+        "grid": {
+            "origin": [0, 0],
+            "columns": 0,
+            "rows": 0,
+            "spacing": [50, 50]
+        },
+        "seed": None
+    },
+    "trigger": {
+        "enabled": False,
+        "region": [0, 0, 16, 16],
+        "color": [255, 0, 0],
+        "tolerance": 16,
+        "min_fraction": 0.5,
+        "invert": False,
+        "downsample": 4,
+        "poll_interval_ms": 5.0,
+        "source": "auto"
+    },
+    "timing": {
+        "spin_margin_ms": 1.0,
+        "auto_tune_margin": True,
+        "catch_up_policy": "skip",
+        "max_lateness_ms": 20.0
+    },
+    "jitter": {
+        "interval": {
+            "distribution": "none",
+            "amount_percent": 0.0
+        },
+        "duty": {
+            "distribution": "none",
+            "amount_percent": 0.0
+        },
+        "seed": None,
+        "batch_size": 1024
+    },
+    "telemetry": {
+        "buffer_size": 4096,
+        "window": 1000
+    },
+    "profiling": {
+        "phase_counters": False,
+        "profiler": "none",
+        "sample_interval_ms": 1.0,
+        "output_dir": ""
+    },
+    "history": {
+        "enabled": True,
+        "path": "",
+        "max_bytes": 1048576,
+        "backup_count": 3
+    },
+    "control_socket": {
+        "enabled": False,
+        "path": ""
+    },
+    "engine_process": {
+        "enabled": False,
+        "cpu_affinity": [],
+        "nice": 0,
+        "publish_interval_ms": 20.0
+    },
+    "click_limit": {
+        "enabled": False,
+        "count": 1000
+    },
+    "duration_limit": {
+        "enabled": False,
+        "seconds": 60.0
+    },
+    "rate_limit": {
+        "enabled": False,
+        "max_clicks": 100,
+        "window_ms": 1000.0
+    },
+    "last_position": {
+        "x": 0,
+        "y": 0
+    }
+}
+
+# Config keys that require the hotkey table to be recompiled
+HOTKEY_KEYS = ("hotkey", "activation_mode", "hotkey_bindings", "streams", "macros")
+
+# Hotkey actions, plus prefixes of actions that name a stream, macro or profile
+HOTKEY_ACTIONS = ("toggle", "start", "stop", "hold")
+HOTKEY_ACTION_PREFIXES = ("stream:", "macro:", "profile:")
+
+ACTIVATION_MODES = ("toggle", "hold")
+POSITION_MODES = ("track", "query", "locked")
+
+
+def merge_defaults(config, defaults):
+    """Fill in any keys missing from config with copies of the defaults"""
+    for key, value in defaults.items():
+        if key not in config:
+            config[key] = copy.deepcopy(value)
+        elif isinstance(value, dict) and isinstance(config[key], dict):
+            merge_defaults(config[key], value)
+    return config
+
+
+def _is_number(value, minimum=0, exclusive=False):
+    """Is value a real number of at least (or with exclusive, above) minimum?"""
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    return value > minimum if exclusive else value >= minimum
+
+
+def _is_int(value, minimum=0):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+
+def _require(valid, message):
+    if not valid:
+        raise ValueError(message)
+
+
+def _check_settings(config, section):
+    """Check a config section that is used outside the click plan
+
+    Raises ValueError for values that would break a session or the next
+    startup. Sections that are compiled elsewhere are left alone.
+    """
+    value = config[section]
+    if section == "backend":
+        _require(value == "auto" or value in BACKENDS, f"Unknown backend: {value!r}")
+    elif section == "position_mode":
+        _require(value in POSITION_MODES, f"Unknown position mode: {value!r}")
+    elif section == "activation_mode":
+        _require(value in ACTIVATION_MODES, f"Unknown activation mode: {value!r}")
+    elif section == "save_delay_ms":
+        _require(_is_number(value), f"Save delay must be a non-negative number, got {value!r}")
+    elif section == "active_profile":
+        _require(isinstance(value, str), f"Active profile must be a name, got {value!r}")
+    elif section == "profile_base":
+        for key in value:
+            _require(key in PROFILE_KEYS, f"Profiles cannot set {key!r}")
+        ClickPlan.from_config(dict(config, **base_settings(config)))
+    elif section == "timing":
+        _require(_is_number(value["spin_margin_ms"]),
+                 f"Spin margin must be a non-negative number, got {value['spin_margin_ms']!r}")
+        _require(isinstance(value["auto_tune_margin"], bool), "auto_tune_margin must be true or false")
+    elif section == "telemetry":
+        _require(_is_int(value["buffer_size"], 1),
+                 f"Telemetry buffer size must be a positive integer, got {value['buffer_size']!r}")
+        _require(_is_int(value["window"], 1),
+                 f"Telemetry window must be a positive integer, got {value['window']!r}")
+    elif section == "history":
+        _require(isinstance(value["enabled"], bool), "history.enabled must be true or false")
+        _require(isinstance(value["path"], str), "History path must be a string")
+        _require(_is_int(value["max_bytes"], 1),
+                 f"History max_bytes must be a positive integer, got {value['max_bytes']!r}")
+        _require(_is_int(value["backup_count"]),
+                 f"History backup_count must be a non-negative integer, got {value['backup_count']!r}")
+    elif section == "control_socket":
+        _require(isinstance(value["enabled"], bool), "control_socket.enabled must be true or false")
+        _require(isinstance(value["path"], str), "Control socket path must be a string")
+    elif section == "engine_process":
+        _require(isinstance(value["enabled"], bool), "engine_process.enabled must be true or false")
+        _require(isinstance(value["cpu_affinity"], list) and all(_is_int(cpu) for cpu in value["cpu_affinity"]),
+                 f"CPU affinity must be a list of CPU numbers, got {value['cpu_affinity']!r}")
+        _require(_is_int(value["nice"], -20), f"Nice value must be an integer, got {value['nice']!r}")
+        _require(_is_number(value["publish_interval_ms"], exclusive=True),
+                 f"Publish interval must be a positive number, got {value['publish_interval_ms']!r}")
+    elif section == "profiling":
+        _require(isinstance(value["profiler"], str), "Profiler must be a name")
+        _require(_is_number(value["sample_interval_ms"], exclusive=True),
+                 f"Sample interval must be a positive number, got {value['sample_interval_ms']!r}")
+        _require(isinstance(value["output_dir"], str), "Profile output directory must be a string")
+    elif section == "last_position":
+        _require(_is_number(value["x"], float("-inf")) and _is_number(value["y"], float("-inf")),
+                 f"Last position must be numbers, got {value!r}")
+
+
+def config_with_update(config, key, value):
+    """Return a copy of config with key set to value, raising ValueError if invalid
+
+    The copy shares everything but the changed section with config. The
+    click plan is always compiled; macros, streams, hotkeys and profiles
+    only when the change touches them, so entries that were already
+    skipped at load time do not block unrelated changes. Other sections
+    are type- and range-checked when they change.
+    """
+    parts = key.split(".") if isinstance(key, str) else None
+    if not parts or len(parts) > 2 or parts[0] not in config:
+        raise ValueError(f"Unknown config key: {key!r}")
+    section = parts[0]
+    updated = dict(config)
+    if len(parts) == 1:
+        updated[section] = value
+    else:
+        if not isinstance(config[section], dict):
+            raise ValueError(f"Unknown config key: {key!r}")
+        updated[section] = dict(config[section])
+        updated[section][parts[1]] = value
+
+    default = DEFAULT_CONFIG.get(section)
+    if isinstance(default, (dict, list)) and not isinstance(updated[section], type(default)):
+        raise ValueError(f"{section} must be a JSON {'object' if isinstance(default, dict) else 'array'}")
+    try:
+        _check_settings(updated, section)
+        ClickPlan.from_config(updated)
+        if section == "macros":
+            for name, steps in updated["macros"].items():
+                compile_macro(steps)
+        if section in ("streams", "timing"):
+            for spec in updated["streams"]:
+                stream = ClickStream.from_config(spec, updated["timing"])
+                if stream.hotkey:
+                    parse_spec(stream.hotkey)
+        if section in ("hotkey", "hotkey_bindings"):
+            parse_spec(updated["hotkey"])
+            for spec, action in updated["hotkey_bindings"].items():
+                parse_spec(spec)
+                if action not in HOTKEY_ACTIONS and not action.startswith(HOTKEY_ACTION_PREFIXES):
+                    raise ValueError(f"Unknown hotkey action: {action}")
+        if section == "profiles":
+            for name, profile in updated["profiles"].items():
+                if not isinstance(profile, dict):
+                    raise ValueError(f"Profile {name} must be an object")
+                settings = dict(updated)
+                settings.update(profile_overlay(updated, profile))
+                ClickPlan.from_config(settings)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid {key}: {e}")
+    return updated
+
 
 class AutoClicker:
-    def __init__(self, config_path):
-        self.mouse = MouseController()
+    def __init__(self, config_path, backend=None, listen_hotkeys=True):
         self.config_path = config_path
+        # Run-only overrides: key -> (value to save, override value); set
+        # before loading, which saves a default config on first launch
+        self.overrides = {}
         self.load_config()
-        
+
+        # Validated click settings; swapped atomically when the config changes
+        self.plan = self._compile_plan()
+
+        # Named profiles, each precompiled into (plan, overlay) for instant
+        # switching; all of them are overlaid on the base settings, which
+        # are saved with the config
+        self.profile_base = base_settings(self.config)
+        self.config["profile_base"] = self.profile_base
+        self.profiles = compile_profiles(self.config, self.profile_base)
+
+        # Debounced background config saves
+        self.config_writer = ConfigWriter(
+            config_path,
+            self._serialize_config,
+            delay=self.config["save_delay_ms"] / 1000.0
+        )
+
         self.running = False
-        self.click_thread = None
         self.click_count = 0
+        self.allocations_avoided = 0
+        self.session_start = None
+        self.session_end = None
+        self.status_listeners = []
         self.stop_event = threading.Event()
-        
-        # Button mapping
-        self.button_map = {
-            "left": Button.left,
-            "right": Button.right,
-            "middle": Button.middle
-        }
-        
+        self.telemetry = ClickTelemetry(
+            capacity=self.config["telemetry"]["buffer_size"],
+            window=self.config["telemetry"]["window"]
+        )
+        self.scheduler = None
+
+        # Activation to first click, and deactivation to the last event
+        self.activated_at = None
+        self.deactivated_at = None
+        self.first_click_latency = LatencyHistogram()
+        self.last_click_latency = LatencyHistogram()
+
+        # Summaries of finished sessions, appended to a log by a writer thread
+        self.stop_reason = None
+        self.history = None
+        history = self.config["history"]
+        if history["enabled"]:
+            path = history["path"] or os.path.join(
+                os.path.dirname(os.path.abspath(config_path)), "history.jsonl"
+            )
+            self.history = SessionHistory(path, history["max_bytes"], history["backup_count"])
+
+        # Pixel trigger of the current session; frame_source replaces screen
+        # capture when set (e.g. a SyntheticFrameSource in tests)
+        self.trigger = None
+        self.frame_source = None
+        self.trigger_latency = LatencyHistogram()
+
+        # Per-phase costs, collected only while profiling.phase_counters is on
+        self.phase_counters = PhaseCounters()
+        self.last_profile_path = None
+
+        # One long-lived click worker, parked until a session starts, so
+        # activation never pays for creating a thread or a waiter
+        self.waiter = None
+        self.waiter_settings = None
+        self._session_waiter()
+        self.session_request = None
+        self.wake_event = threading.Event()
+        self.idle_event = threading.Event()
+        self.idle_event.set()
+        self.closing = False
+        self.worker = threading.Thread(target=self._worker_loop, daemon=True)
+        self.worker.start()
+
+        # Click injection backend
+        if backend is None:
+            backend = create_backend(self.config["backend"])
+        self.backend = backend
+
+        # Extra click streams, all driven by one scheduler thread
+        self.streams = StreamMultiplexer(
+            backend,
+            spin_margin_ms=self.config["timing"]["spin_margin_ms"],
+            auto_tune=self.config["timing"]["auto_tune_margin"],
+            position_mode=self.config["position_mode"]
+        )
+        self.streams.set_streams(self.config["streams"], self.config["timing"])
+
+        # Active input recorder, if any
+        self.recorder = None
+
+        # Macros are compiled into playback timelines once, not per run
+        self.macros = compile_macros(self.config["macros"])
+
+        # Hotkeys are compiled into a lookup table, rebuilt on config changes
+        self.hotkeys = HotkeyMatcher()
+        self.compile_hotkeys()
+
         # Setup keyboard listener
         self.keyboard_listener = None
-        self.setup_keyboard_listener()
-    
+        if listen_hotkeys:
+            self.setup_keyboard_listener()
+
+        # Local control socket for external automation
+        self.control_server = None
+        if self.config["control_socket"]["enabled"]:
+            self.start_control_server(self.config["control_socket"]["path"] or None)
+
+    def start_control_server(self, path=None):
+        """Serve the control API on a Unix domain socket"""
+        # asyncio is only imported when the control API is used
+        from control import ControlServer, DEFAULT_SOCKET_PATH
+
+        if self.control_server:
+            return True
+        server = ControlServer(self, path or DEFAULT_SOCKET_PATH)
+        if not server.start():
+            print(f"Error starting control server on {server.path}")
+            return False
+        self.control_server = server
+        return True
+
     def load_config(self):
         """Load configuration from JSON file"""
         try:
             if os.path.exists(self.config_path):
                 with open(self.config_path, 'r') as f:
-                    self.config = json.load(f)
+                    self.config = merge_defaults(json.load(f), DEFAULT_CONFIG)
             else:
-                # Default configuration
-                self.config = {
-                    "click_interval_ms": 100.0,
-                    "duty_cycle_percent": 50.0,
-                    "mouse_button": "left",
-                    "activation_mode": "toggle",
-                    "hotkey": "f6",
-                    "click_limit": {
-                        "enabled": False,
-                        "count": 1000
-                    },
-                    "last_position": {
-                        "x": 0,
-                        "y": 0
-                    }
-                }
+                self.config = copy.deepcopy(DEFAULT_CONFIG)
                 self.save_config()
         except Exception as e:
             print(f"Error loading config: {e}")
             # Set default values if loading fails
-            self.config = {
-                "click_interval_ms": 100.0,
-                "duty_cycle_percent": 50.0,
-                "mouse_button": "left",
-                "activation_mode": "toggle",
-                "hotkey": "f6",
-                "click_limit": {
-                    "enabled": False,
-                    "count": 1000
-                },
-                "last_position": {
-                    "x": 0,
-                    "y": 0
-                }
-            }
-    
+            self.config = copy.deepcopy(DEFAULT_CONFIG)
+
+    def _compile_plan(self):
+        """Compile the current config into a click plan, falling back to defaults"""
+        try:
+            return ClickPlan.from_config(self.config)
+        except ValueError as e:
+            print(f"Invalid click settings, using defaults: {e}")
+            return ClickPlan.from_config(DEFAULT_CONFIG)
+
+    def _refresh_plan(self):
+        """Recompile the click plan and swap it in if the settings changed
+
+        A running session picks up the new plan at its next cycle boundary.
+        Invalid settings (e.g. a half-typed interval) keep the current plan.
+        Profile plans are rebuilt too, since profiles overlay these settings.
+        """
+        self.profiles = compile_profiles(self.config, self.profile_base)
+        try:
+            plan = ClickPlan.from_config(self.config)
+        except ValueError:
+            return
+        if plan != self.plan:
+            self.plan = plan
+
+    def _serialize_config(self):
+        config = self.config
+        if self.overrides:
+            # Save the values the overrides replaced, unless changed since
+            config = copy.deepcopy(config)
+            for key, (saved, override) in self.overrides.items():
+                parts = key.split(".")
+                section = config[parts[0]] if len(parts) == 2 else config
+                if section.get(parts[-1]) == override:
+                    section[parts[-1]] = saved
+        return json.dumps(config, indent=2)
+
     def save_config(self):
-        """Save configuration to JSON file"""
+        """Save configuration to JSON file immediately"""
         try:
-            with open(self.config_path, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            write_atomic(self.config_path, self._serialize_config())
         except Exception as e:
             print(f"Error saving config: {e}")
-    
-    def update_config(self, key, value):
-        """Update a specific configuration value"""
-        if key in self.config:
+
+    def update_config(self, key, value, persist=True):
+        """Update a specific configuration value, e.g. "click_limit.enabled"
+
+        The change is validated first; invalid changes are reported and
+        leave the config untouched. Returns True if the change was applied.
+
+        With persist=False the change only applies to this run (e.g. command
+        line overrides): it is not scheduled for saving, and later saves
+        write the value it replaced for as long as the override is in place.
+        """
+        try:
+            config_with_update(self.config, key, value)
+        except ValueError as e:
+            print(f"Rejected setting {key}: {e}")
+            return False
+
+        parts = key.split(".")
+        section = parts[0]
+        if persist:
+            # A persisted change replaces any run-only override of the key
+            for name in list(self.overrides):
+                if name == key or name.startswith(key + ".") or key.startswith(name + "."):
+                    del self.overrides[name]
+        if len(parts) == 2:
+            if not persist:
+                self._track_override(key, self.config[section].get(parts[1]), value)
+            self.config[section][parts[1]] = value
+        else:
+            if not persist:
+                self._track_override(key, self.config[key], value)
             self.config[key] = value
-            self.save_config()
-        elif "." in key:
-            # Handle nested config values like "click_limit.enabled"
-            parts = key.split(".")
-            if len(parts) == 2 and parts[0] in self.config and 
-isinstance(self.config[parts[0]], dict):
-                self.config[parts[0]][parts[1]] = value
-                self.save_config()
-    
+        if section in PROFILE_KEYS:
+            # Settings changed outside of profiles are what profiles overlay;
+            # the saved copy of a run-only change keeps the value it replaced
+            base_key = "profile_base." + section
+            if persist:
+                self.overrides.pop(base_key, None)
+            else:
+                self._track_override(base_key, self.profile_base[section], self.config[section])
+            self.profile_base[section] = copy.deepcopy(self.config[section])
+        elif section == "profile_base":
+            self.profile_base = base_settings(self.config)
+            self.config["profile_base"] = self.profile_base
+
+        self._refresh_plan()
+        if section in ("streams", "timing"):
+            self.streams.set_streams(self.config["streams"], self.config["timing"])
+        elif section == "position_mode":
+            self.streams.position_mode = value
+        elif section == "macros":
+            self.macros = compile_macros(self.config["macros"])
+        if section in HOTKEY_KEYS:
+            self.compile_hotkeys()
+        if persist:
+            self.config_writer.schedule()
+        return True
+
+    def _track_override(self, key, current, value):
+        """Remember the saved value a run-only change replaces"""
+        saved = self.overrides[key][0] if key in self.overrides else copy.deepcopy(current)
+        self.overrides[key] = (saved, copy.deepcopy(value))
+
+    def hotkey_action(self, action):
+        """Return (on_press, on_release) callbacks for a hotkey action name"""
+        if action.startswith("stream:"):
+            name = action[len("stream:"):]
+            return (lambda: self.streams.toggle_stream(name), None)
+        if action.startswith("macro:"):
+            name = action[len("macro:"):]
+            return (lambda: self.toggle_macro(name), None)
+        if action.startswith("profile:"):
+            name = action[len("profile:"):]
+            return (lambda: self.select_profile(name), None)
+
+        actions = {
+            "toggle": (self.toggle_clicking, None),
+            "start": (self.start_clicking, None),
+            "stop": (self.stop_clicking, None),
+            "hold": (self.start_clicking, self.stop_clicking)
+        }
+        if action not in actions:
+            raise ValueError(f"Unknown hotkey action: {action}")
+        return actions[action]
+
+    def select_profile(self, name):
+        """Switch to a named profile, also mid-session; returns False if unknown
+
+        The running loop picks up the precompiled plan at its next cycle
+        boundary. Settings the profile does not set go back to their base
+        values. Saving the config happens later on the writer thread.
+        """
+        compiled = self.profiles.get(name)
+        if compiled is None:
+            print(f"Unknown profile: {name}")
+            return False
+        plan, overlay = compiled
+        self.plan = plan
+        apply_profile(self.config, self.profile_base, overlay)
+        self.config["active_profile"] = name
+        self.config_writer.schedule()
+        self._notify_status()
+        return True
+
+    def compile_hotkeys(self):
+        """Compile the activation hotkey and extra bindings into the matcher"""
+        bindings = []
+
+        # Primary activation hotkey
+        mode = "hold" if self.config["activation_mode"] == "hold" else "toggle"
+        bindings.append((self.config["hotkey"],) + self.hotkey_action(mode))
+
+        # Per-stream toggle hotkeys
+        for stream in self.streams.streams.values():
+            if stream.hotkey:
+                bindings.append((stream.hotkey,) + self.hotkey_action(f"stream:{stream.name}"))
+
+        # Extra bindings, e.g. {"ctrl+f7": "stop"}
+        for spec, action in self.config["hotkey_bindings"].items():
+            try:
+                bindings.append((spec,) + self.hotkey_action(action))
+            except ValueError as e:
+                print(f"Ignoring hotkey {spec}: {e}")
+
+        self.hotkeys.compile(bindings)
+
     def setup_keyboard_listener(self):
         """Setup keyboard listener for hotkey detection"""
+        if KeyboardListener is None:
+            print("Keyboard listener unavailable, hotkeys disabled")
+            return
+
+        hotkeys = self.hotkeys
+
         def on_press(key):
-            try:
-                # Convert key to string for comparison
-                if hasattr(key, 'char'):
-                    key_str = key.char.lower() if key.char else None
-                elif isinstance(key, Key):
-                    key_str = key.name.lower()
-                else:
-                    key_str = key.name.lower() if hasattr(key, 'name') 
-else str(key).lower()
-                
-                # Check if the pressed key matches the hotkey
-                if key_str == self.config["hotkey"].lower():
-                    if self.config["activation_mode"] == "toggle":
-                        self.toggle_clicking()
-                    elif self.config["activation_mode"] == "hold" and not 
-self.running:
-                        self.start_clicking()
-            except AttributeError:
-                # Special keys might not have char attribute
-                pass
-        
+            callback = hotkeys.press(key)
+            if callback:
+                callback()
+
         def on_release(key):
-            try:
-                # Convert key to string for comparison
-                if hasattr(key, 'char'):
-                    key_str = key.char.lower() if key.char else None
-                elif isinstance(key, Key):
-                    key_str = key.name.lower()
-                else:
-                    key_str = key.name.lower() if hasattr(key, 'name') 
-else str(key).lower()
-                
-                # For hold mode, stop clicking when hotkey is released
-                if key_str == self.config["hotkey"].lower() and 
-self.config["activation_mode"] == "hold" and self.running:
-                    self.stop_clicking()
-            except AttributeError:
-                pass
-        
+            callback = hotkeys.release(key)
+            if callback:
+                callback()
+
         # Start the keyboard listener
-        self.keyboard_listener = KeyboardListener(on_press=on_press, 
-on_release=on_release)
+        self.keyboard_listener = KeyboardListener(on_press=on_press, on_release=on_release)
         self.keyboard_listener.start()
-    
+
+    def add_status_listener(self, callback):
+        """Register callback(status) for running-state changes
+
+        Callbacks run on whichever thread changed the state (the caller of
+        start_clicking, or the click thread when a session ends), so GUI code
+        must hand the status over to its own thread, e.g. through a queue.
+        """
+        self.status_listeners.append(callback)
+
+    def _notify_status(self):
+        """Send the current running state to all status listeners"""
+        status = {
+            "running": self.running,
+            "click_count": self.click_count,
+            "achieved_cps": self.get_achieved_cps(),
+            "profile": self.config["active_profile"]
+        }
+        for callback in self.status_listeners:
+            try:
+                callback(status)
+            except Exception as e:
+                print(f"Error in status listener: {e}")
+
     def toggle_clicking(self):
         """Toggle the auto clicker on/off"""
         if self.running:
             self.stop_clicking()
         else:
             self.start_clicking()
-    
+
+    def _session_waiter(self):
+        """Return the shared waiter, rebuilt only if the timing settings changed
+
+        Reusing it keeps the auto-tuned spin margin from earlier sessions, so
+        the first clicks of a session are as punctual as the rest.
+        """
+        timing = self.config["timing"]
+        settings = (timing["spin_margin_ms"], timing["auto_tune_margin"])
+        if settings != self.waiter_settings:
+            self.waiter = PrecisionWaiter(
+                self.stop_event,
+                spin_margin_ms=settings[0],
+                auto_tune=settings[1]
+            )
+            self.waiter_settings = settings
+        return self.waiter
+
+    def _worker_loop(self):
+        """Run sessions on the long-lived click worker as they are requested"""
+        while True:
+            self.wake_event.wait()
+            self.wake_event.clear()
+            if self.closing:
+                return
+            target, args = self.session_request
+            try:
+                self._run_session(target, args)
+            except Exception as e:
+                print(f"Error in click session: {e}")
+                if self.running:
+                    # Session setup failed before the loop's own cleanup
+                    self.running = False
+                    self._notify_status()
+            finally:
+                self.idle_event.set()
+
+    def _run_session(self, target, args):
+        """Run one session, under a profiler if the config asks for one"""
+        profiling = self.config["profiling"]
+        if profiling["profiler"] not in PROFILERS:
+            print(f"Unknown profiler {profiling['profiler']!r}, running unprofiled")
+        if profiling["profiler"] not in PROFILERS or profiling["profiler"] == "none":
+            target(*args)
+            return
+        output_dir = profiling["output_dir"] or os.path.dirname(os.path.abspath(self.config_path))
+        path = run_profiled(
+            profiling["profiler"], target, args, output_dir, profiling["sample_interval_ms"]
+        )
+        self.last_profile_path = path
+        print(f"Profile written to {path}")
+
+    def _start_session(self, target, *args):
+        """Hand target to the click worker unless a session is running"""
+        if self.running:
+            return False
+        # A session that just ended may still be recording its summary
+        if not self.idle_event.wait(timeout=1.0):
+            print("Previous click session is still finishing; not starting")
+            return False
+        self.activated_at = time.perf_counter()
+        self.deactivated_at = None
+        self.running = True
+        self.click_count = 0
+        self.allocations_avoided = 0
+        self.phase_counters.reset()
+        self.stop_event.clear()
+        self.session_request = (target, args)
+        # Busy from now on, so a stop issued before the worker wakes waits for it
+        self.idle_event.clear()
+        self.wake_event.set()
+        self._notify_status()
+        return True
+
     def start_clicking(self):
         """Start the auto clicking process"""
-        if not self.running:
-            self.running = True
-            self.click_count = 0
-            self.stop_event.clear()
-            self.click_thread = threading.Thread(target=self._click_loop)
-            self.click_thread.daemon = True
-            self.click_thread.start()
-            return True
-        return False
-    
+        return self._start_session(self._click_loop)
+
+    def start_macro(self, name, speed=1.0):
+        """Start playing a compiled macro by name"""
+        timeline = self.macros.get(name)
+        if timeline is None:
+            print(f"Unknown macro: {name}")
+            return False
+        if not speed > 0:
+            print(f"Macro speed must be positive, got {speed}")
+            return False
+        return self._start_session(self._macro_loop, timeline, speed)
+
+    def start_recording(self, path):
+        """Start recording real mouse/keyboard input to a binary file"""
+        if self.recorder is not None:
+            return False
+        try:
+            self.recorder = InputRecorder(path)
+        except (BackendUnavailable, OSError) as e:
+            print(f"Cannot record input: {e}")
+            return False
+        self.recorder.start()
+        return True
+
+    def stop_recording(self):
+        """Stop recording; returns the number of events written"""
+        if self.recorder is None:
+            return 0
+        recorder, self.recorder = self.recorder, None
+        recorder.stop()
+        return recorder.event_count
+
+    def start_replay(self, path, speed=1.0, replay_keys=False):
+        """Start replaying a recording file with its original timing"""
+        if not speed > 0:
+            print(f"Replay speed must be positive, got {speed}")
+            return False
+        try:
+            recording = Recording(path)
+        except (OSError, ValueError) as e:
+            print(f"Cannot replay {path}: {e}")
+            return False
+        if not self._start_session(self._replay_loop, recording, speed, replay_keys):
+            recording.close()
+            return False
+        return True
+
+    def toggle_macro(self, name):
+        """Toggle playback of a macro"""
+        if self.running:
+            self.stop_clicking()
+        else:
+            self.start_macro(name)
+
     def stop_clicking(self):
         """Stop the auto clicking process"""
         if self.running:
+            self.deactivated_at = time.perf_counter()
             self.running = False
             self.stop_event.set()
-            if self.click_thread:
-                self.click_thread.join(timeout=1.0)
+            if not self.idle_event.wait(timeout=1.0):
+                print("Click session did not stop within 1 s")
+                return False
             return True
         return False
-    
+
     def _click_loop(self):
-        """Main clicking loop with high-precision timing using macOS 
-native events"""
-        button = self.button_map.get(self.config["mouse_button"], 
-Button.left)
-        interval_sec = self.config["click_interval_ms"] / 1000.0
-        duty_cycle = self.config["duty_cycle_percent"] / 100.0
-        
-        # Calculate press and release durations
-        press_duration = interval_sec * duty_cycle
-        release_duration = interval_sec * (1 - duty_cycle)
-        
-        limit_enabled = self.config["click_limit"]["enabled"]
-        limit_count = self.config["click_limit"]["count"]
-        
-        # Get current mouse position for more efficient clicking
-        current_pos = 
-Quartz.CGEventGetLocation(Quartz.CGEventCreate(None))
-        
-        # Determine which button to use
-        button_type = {
-            Button.left: Quartz.kCGMouseButtonLeft,
-            Button.right: Quartz.kCGMouseButtonRight,
-            Button.middle: Quartz.kCGMouseButtonCenter
-        }.get(button, Quartz.kCGMouseButtonLeft)
-        
-        while self.running and not self.stop_event.is_set():
-            # Perform mouse click with high-precision timing
-            click_start_time = time.perf_counter()
-            
-            # Get current position for the click
-            current_pos = 
-Quartz.CGEventGetLocation(Quartz.CGEventCreate(None))
-            
-            # Create mouse down event
-            mouse_down = Quartz.CGEventCreateMouseEvent(
-                None, 
-                Quartz.kCGEventLeftMouseDown if button == Button.left else 
-Quartz.kCGEventRightMouseDown, 
-                current_pos, 
-                button_type
-            )
-            
-            # Post the mouse down event
-            Quartz.CGEventPost(Quartz.kCGHIDEventTap, mouse_down)
-            
-            # Wait for press duration with high precision
-            press_end_target = click_start_time + press_duration
-            while time.perf_counter() < press_end_target and not 
-self.stop_event.is_set():
-                pass
-            
-            # Create mouse up event
-            mouse_up = Quartz.CGEventCreateMouseEvent(
-                None, 
-                Quartz.kCGEventLeftMouseUp if button == Button.left else 
-Quartz.kCGEventRightMouseUp, 
-                current_pos, 
-                button_type
-            )
-            
-            # Post the mouse up event
-            Quartz.CGEventPost(Quartz.kCGHIDEventTap, mouse_up)
-            
-            # Increment click counter
+        """Main clicking loop with high-precision timing through the click backend"""
+        backend = self.backend
+        plan = self.plan
+
+        # Sleep until shortly before each deadline, then spin
+        waiter = self._session_waiter()
+        plain_backend, plain_waiter = backend, waiter
+
+        # Absolute deadlines so per-click overhead never accumulates
+        scheduler = ClickScheduler(
+            plan.slot_interval,
+            policy=plan.catch_up_policy,
+            max_lateness=plan.max_lateness
+        )
+        self.scheduler = scheduler
+        scheduler.start()
+        telemetry = self.telemetry
+        record = telemetry.record
+        perf_counter = time.perf_counter
+        self.session_start = scheduler.t0
+        self.session_end = None
+
+        # Build the down/up events once; they are only moved when the cursor moves
+        position_mode = self.config["position_mode"]
+        current_pos = backend.get_position()
+        tracker = None
+        if position_mode == "track":
+            try:
+                tracker = CursorTracker(current_pos)
+                tracker.start()
+            except BackendUnavailable:
+                position_mode = "query"
+        follow_cursor = position_mode != "locked"
+
+        active_plan = None
+        awaiting_first_click = True
+        trigger = None
+        awaiting_trigger = False
+        stop_reason = "stopped"
+        try:
+            while self.running and not self.stop_event.is_set():
+                # Apply a new plan at the cycle boundary
+                plan = self.plan
+                if plan is not active_plan:
+                    if active_plan is None or plan.instrument != active_plan.instrument:
+                        # Timing wrappers are only in the loop while instrumenting
+                        if plan.instrument:
+                            backend = InstrumentedBackend(plain_backend, self.phase_counters)
+                            waiter = InstrumentedWaiter(plain_waiter, self.phase_counters)
+                        else:
+                            backend, waiter = plain_backend, plain_waiter
+                    targets_changed = (active_plan is None
+                                       or plan.targets != active_plan.targets
+                                       or plan.target_mode != active_plan.target_mode
+                                       or plan.target_weights != active_plan.target_weights
+                                       or plan.target_seed != active_plan.target_seed)
+                    if targets_changed:
+                        target_cycle = None
+                        if plan.targets is not None:
+                            target_cycle = TargetCycle(
+                                len(plan.targets), plan.target_mode,
+                                plan.target_weights, plan.target_seed
+                            )
+                    if active_plan is None or plan.button != active_plan.button or targets_changed:
+                        if target_cycle is None:
+                            prepared = backend.prepare(plan.button, current_pos)
+                        else:
+                            # Every target's events are built once; a click only picks one
+                            target_events = [backend.prepare(plan.button, position)
+                                             for position in plan.targets]
+                            prepared = target_events[target_cycle.next()]
+                    # Fixed targets never follow the cursor
+                    track_cursor = follow_cursor and target_cycle is None
+                    if active_plan is None or plan.trigger != active_plan.trigger:
+                        if trigger is not None:
+                            trigger.stop()
+                            trigger = None
+                        if plan.trigger is not None:
+                            try:
+                                trigger = self._create_trigger(plan.trigger)
+                            except BackendUnavailable as e:
+                                print(f"Error starting pixel trigger: {e}")
+                                self.running = False
+                                stop_reason = "error"
+                                break
+                            self.trigger = trigger
+                            trigger.start()
+                    if active_plan is not None and plan.slot_interval != active_plan.slot_interval:
+                        scheduler.retime(plan.slot_interval)
+                    scheduler.policy = plan.catch_up_policy
+                    scheduler.max_lateness = plan.max_lateness
+                    rate_limit = plan.rate_limit or (None, None)
+                    scheduler.set_limits(plan.duration_limit, *rate_limit, cost=plan.burst_size)
+                    if plan.burst_size > 1:
+                        telemetry.reset(plan.slot_interval, None, plan.burst_size)
+                    else:
+                        telemetry.reset(plan.interval, plan.duty_cycle)
+                    if (active_plan is None
+                            or plan.interval_jitter != active_plan.interval_jitter
+                            or plan.duty_jitter != active_plan.duty_jitter
+                            or plan.jitter_seed != active_plan.jitter_seed
+                            or plan.jitter_batch_size != active_plan.jitter_batch_size):
+                        batch_size = plan.jitter_batch_size
+                        seed = plan.jitter_seed
+                        interval_jitter = JitterSource(*plan.interval_jitter, seed, batch_size)
+                        # Offset the seed so the two streams are independent
+                        duty_seed = None if seed is None else seed + 1
+                        duty_jitter = JitterSource(*plan.duty_jitter, duty_seed, batch_size)
+                        jitter_enabled = interval_jitter.enabled or duty_jitter.enabled
+                    burst_size = plan.burst_size
+                    press_duration = plan.press_duration
+                    slot_interval = plan.slot_interval
+                    limit_enabled = plan.limit_enabled
+                    limit_count = plan.limit_count
+                    active_plan = plan
+
+                    # The limit may have been lowered below the current count
+                    if limit_enabled and self.click_count >= limit_count:
+                        self.running = False
+                        stop_reason = "click_limit"
+                        break
+
+                # Only click while the watched region matches
+                if trigger is not None and not trigger.active_event.is_set():
+                    if not trigger.wait_active(self.stop_event, scheduler.end_time):
+                        if not self.stop_event.is_set():
+                            # The session duration ran out while waiting
+                            stop_reason = "duration_limit"
+                        break
+                    # Click as soon as the trigger fires, not on the old grid
+                    scheduler.resume(perf_counter())
+                    awaiting_trigger = True
+
+                # Wait for the start of this click's slot
+                click_start_time = scheduler.next_deadline(perf_counter())
+                if click_start_time is None:
+                    # The session duration is used up
+                    stop_reason = "duration_limit"
+                    break
+                if not waiter.wait_until(click_start_time):
+                    break
+                if trigger is not None and not trigger.active_event.is_set():
+                    continue
+
+                # Re-position the prepared events only if the cursor moved
+                if track_cursor:
+                    if tracker:
+                        new_pos = tracker.position
+                    else:
+                        new_pos = backend.get_position()
+                        self.allocations_avoided -= 1
+                    if new_pos != current_pos:
+                        backend.reposition(prepared, new_pos)
+                        current_pos = new_pos
+
+                if burst_size > 1:
+                    # Post the whole burst without per-click loop overhead
+                    count = burst_size
+                    if limit_enabled:
+                        count = min(count, limit_count - self.click_count)
+                    down_time = perf_counter()
+                    if target_cycle is None:
+                        backend.post_burst(prepared, count)
+                    else:
+                        # Spread the burst over the targets, one click each
+                        for _ in range(count):
+                            backend.post_down(prepared)
+                            backend.post_up(prepared)
+                            prepared = target_events[target_cycle.next()]
+                    up_time = perf_counter()
+                    if target_cycle is not None:
+                        target_cycle.refill()
+                    slot_jitter = (interval_jitter.next() - 1.0) * slot_interval if jitter_enabled else 0.0
+                else:
+                    count = 1
+
+                    # Post the mouse down event
+                    down_time = perf_counter()
+                    backend.post_down(prepared)
+
+                    # Wait for press duration, measured from the actual press when late
+                    if jitter_enabled:
+                        hold = press_duration * duty_jitter.next()
+                        slot_jitter = (interval_jitter.next() - 1.0) * slot_interval
+                        # Keep the release ahead of the next (jittered) slot
+                        hold = min(hold, 0.98 * (slot_interval + slot_jitter))
+                    else:
+                        hold = press_duration
+                    press_end_target = max(click_start_time, down_time) + hold
+                    waiter.wait_until(press_end_target)
+
+                    # Post the mouse up event
+                    up_time = perf_counter()
+                    backend.post_up(prepared)
+
+                    # Pick the next target now that this click is done
+                    if target_cycle is not None:
+                        prepared = target_events[target_cycle.next()]
+                        target_cycle.refill()
+
+                record(click_start_time, down_time, up_time)
+                if awaiting_first_click:
+                    self.first_click_latency.record(down_time - self.activated_at)
+                    awaiting_first_click = False
+                if awaiting_trigger:
+                    self.trigger_latency.record(down_time - trigger.activated_at)
+                    awaiting_trigger = False
+
+                # Increment click counter; each click used to allocate a
+                # position query event plus fresh down and up events
+                self.click_count += count
+                self.allocations_avoided += 3 * count
+
+                # Check if we've reached the click limit
+                if limit_enabled and self.click_count >= limit_count:
+                    self.running = False
+                    stop_reason = "click_limit"
+                    break
+
+                if jitter_enabled:
+                    scheduler.advance(slot_jitter, up_time)
+                    # Regenerate used-up jitter batches while waiting for the next slot
+                    interval_jitter.refill()
+                    duty_jitter.refill()
+                else:
+                    scheduler.advance(posted=up_time)
+        except Exception:
+            stop_reason = "error"
+            raise
+        finally:
+            self.session_end = time.perf_counter()
+            # Sessions that end on their own (e.g. click limit) have no deactivation
+            if self.deactivated_at is not None:
+                self.last_click_latency.record(self.session_end - self.deactivated_at)
+            self.running = False
+            if tracker:
+                tracker.stop()
+            if trigger is not None:
+                trigger.stop()
+            self._record_session("click", stop_reason, {
+                "interval_ms": plan.interval * 1000.0,
+                "duty_cycle_percent": plan.duty_cycle * 100.0,
+                "button": plan.button,
+                "burst_size": plan.burst_size
+            })
+            self._notify_status()
+
+    def _create_trigger(self, settings):
+        """Build a PixelTrigger from a plan's compiled trigger settings"""
+        region, color, tolerance, min_fraction, invert, downsample, poll_interval_ms, source = settings
+        if self.frame_source is not None:
+            frame_source = self.frame_source
+        else:
+            frame_source = create_frame_source(source, downsample)
+        condition = ColorCondition(color, tolerance, min_fraction, invert)
+        return PixelTrigger(frame_source, region, condition, poll_interval_ms)
+
+    def _macro_loop(self, timeline, speed):
+        """Play a macro timeline with the same high-precision waiter as _click_loop"""
+        waiter = self._session_waiter()
+
+        def count_click():
             self.click_count += 1
-            
-            # Check if we've reached the click limit
-            if limit_enabled and self.click_count >= limit_count:
-                self.running = False
-                break
-            
-            # Wait for release duration with high precision
-            release_end_target = click_start_time + interval_sec
-            while time.perf_counter() < release_end_target and not 
-self.stop_event.is_set():
-                pass
-    
+
+        start = time.perf_counter()
+        self.session_start = start
+        self.session_end = None
+        stop_reason = "error"
+        try:
+            completed = play_timeline(timeline, self.backend, waiter, start, speed, count_click)
+            stop_reason = "completed" if completed else "stopped"
+        finally:
+            self.session_end = time.perf_counter()
+            self.running = False
+            self._record_session("macro", stop_reason, {"speed": speed})
+            self._notify_status()
+
+    def _replay_loop(self, recording, speed, replay_keys):
+        """Replay a memory-mapped recording with the high-precision waiter"""
+        waiter = self._session_waiter()
+
+        def count_click():
+            self.click_count += 1
+
+        start = time.perf_counter()
+        self.session_start = start
+        self.session_end = None
+        stop_reason = "error"
+        try:
+            completed = replay(recording, self.backend, waiter, start, speed, replay_keys, count_click)
+            stop_reason = "completed" if completed else "stopped"
+        finally:
+            recording.close()
+            self.session_end = time.perf_counter()
+            self.running = False
+            self._record_session("replay", stop_reason, {"speed": speed})
+            self._notify_status()
+
+    def _record_session(self, kind, stop_reason, settings):
+        """Queue a summary of the session that just ended for the history log"""
+        self.stop_reason = stop_reason
+        if self.history is None:
+            return
+        # Convert the perf_counter session bounds to wall-clock times
+        wall_offset = time.time() - time.perf_counter()
+        timing = self.telemetry.summary() if kind == "click" else None
+        self.history.record({
+            "start": self.session_start + wall_offset,
+            "end": self.session_end + wall_offset,
+            "duration_s": self.session_end - self.session_start,
+            "kind": kind,
+            "backend": self.backend.name,
+            "settings": settings,
+            "clicks": self.click_count,
+            "achieved_cps": self.get_achieved_cps(),
+            "lateness_p50_ms": timing["lateness_p50_ms"] if timing else 0.0,
+            "lateness_p99_ms": timing["lateness_p99_ms"] if timing else 0.0,
+            "lateness_max_ms": timing["lateness_max_ms"] if timing else 0.0,
+            "stop_reason": stop_reason
+        })
+
+    def get_achieved_cps(self):
+        """Return the click rate achieved by the current or last session"""
+        if self.session_start is None:
+            return 0.0
+        end = self.session_end if self.session_end is not None else time.perf_counter()
+        elapsed = end - self.session_start
+        return self.click_count / elapsed if elapsed > 0 else 0.0
+
     def get_status(self):
         """Get the current status of the auto clicker"""
         return {
             "running": self.running,
             "click_count": self.click_count,
+            "target_cps": 1.0 / self.plan.interval,
+            "achieved_cps": self.get_achieved_cps(),
+            "backend": self.backend.name,
+            "spin_margin_ms": self.waiter.margin_ms if self.waiter else None,
+            "skipped_slots": self.scheduler.skipped if self.scheduler else 0,
+            "throttled_slots": self.scheduler.throttled if self.scheduler else 0,
+            "stop_reason": self.stop_reason,
+            "phases": self.phase_counters.summary(),
+            "allocations_avoided": self.allocations_avoided,
+            "timing": self.telemetry.summary(),
+            "latency": {
+                "first_click": self.first_click_latency.summary(),
+                "last_click": self.last_click_latency.summary(),
+                "trigger": self.trigger_latency.summary()
+            },
+            "trigger": self.trigger.get_status() if self.trigger else None,
+            "streams": self.streams.get_status(),
             "config": self.config
         }
-    
+
     def cleanup(self):
         """Clean up resources before exiting"""
         self.stop_clicking()
+        self.closing = True
+        self.wake_event.set()
+        self.worker.join(timeout=1.0)
+        self.stop_recording()
+        if self.control_server:
+            self.control_server.stop()
+        self.streams.close()
         if self.keyboard_listener:
             self.keyboard_listener.stop()
-
+        if self.history:
+            self.history.close()
+        self.config_writer.close()
+        self.backend.close()
@@ -0,0 +1,448 @@
+"""
+Click injection backends
+
+Each backend knows how to read the cursor position and post mouse button
+events on one platform. The click loop only talks to this interface, so the
+engine can be imported, benchmarked and load-tested on machines without
+Quartz by selecting the recording or null backend.
+
+The click loop and the stream multiplexer post through one backend from two
+threads. Backends that keep state between calls (an X display connection,
+the last cursor position, recording arrays) serialize it with a lock.
+"""
+
+import sys
+import threading
+import time
+import ctypes
+from array import array
+
+BUTTONS = ("left", "right", "middle")
+
+# Action codes stored by RecordingBackend
+ACTION_DOWN = 1
+ACTION_UP = 2
+ACTION_MOVE = 3
+
+BUTTON_CODES = {"left": 0, "right": 1, "middle": 2}
+
+
+class BackendUnavailable(Exception):
+    """Raised when a backend's platform support cannot be loaded"""
+
+
+class PreparedClick:
+    """Down/up events for one button, built once and reused for every click"""
+
+    __slots__ = ("button", "position", "down", "up")
+
+    def __init__(self, button, position, down=None, up=None):
+        self.button = button
+        self.position = position
+        self.down = down
+        self.up = up
+
+
+class ClickBackend:
+    """Base class for all click injection backends"""
+
+    name = "base"
+
+    def get_position(self):
+        """Return the current cursor position as an (x, y) tuple"""
+        raise NotImplementedError
+
+    def move(self, position):
+        """Move the cursor to the given position"""
+        raise NotImplementedError
+
+    def press(self, button, position):
+        """Post a mouse down event for button at position"""
+        raise NotImplementedError
+
+    def release(self, button, position):
+        """Post a mouse up event for button at position"""
+        raise NotImplementedError
+
+    def prepare(self, button, position):
+        """Build reusable down/up events for button at position"""
+        return PreparedClick(button, position)
+
+    def reposition(self, prepared, position):
+        """Move prepared events to a new position without rebuilding them"""
+        prepared.position = position
+
+    def post_down(self, prepared):
+        """Post the prepared mouse down event"""
+        self.press(prepared.button, prepared.position)
+
+    def post_up(self, prepared):
+        """Post the prepared mouse up event"""
+        self.release(prepared.button, prepared.position)
+
+    def post_burst(self, prepared, count):
+        """Post count back-to-back down/up pairs from the prepared events"""
+        post_down = self.post_down
+        post_up = self.post_up
+        for _ in range(count):
+            post_down(prepared)
+            post_up(prepared)
+
+    def close(self):
+        """Release any platform resources held by the backend"""
+        pass
+
+
+class QuartzBackend(ClickBackend):
+    """macOS backend posting native CGEvents"""
+
+    name = "quartz"
+
+    def __init__(self):
+        try:
+            import Quartz
+        except ImportError as e:
+            raise BackendUnavailable(f"Quartz is not available: {e}")
+        self.Quartz = Quartz
+
+        self.button_types = {
+            "left": Quartz.kCGMouseButtonLeft,
+            "right": Quartz.kCGMouseButtonRight,
+            "middle": Quartz.kCGMouseButtonCenter
+        }
+        self.down_types = {
+            "left": Quartz.kCGEventLeftMouseDown,
+            "right": Quartz.kCGEventRightMouseDown,
+            "middle": Quartz.kCGEventOtherMouseDown
+        }
+        self.up_types = {
+            "left": Quartz.kCGEventLeftMouseUp,
+            "right": Quartz.kCGEventRightMouseUp,
+            "middle": Quartz.kCGEventOtherMouseUp
+        }
+
+    def get_position(self):
+        location = self.Quartz.CGEventGetLocation(self.Quartz.CGEventCreate(None))
+        return (location.x, location.y)
+
+    def move(self, position):
+        event = self.Quartz.CGEventCreateMouseEvent(
+            None,
+            self.Quartz.kCGEventMouseMoved,
+            position,
+            self.Quartz.kCGMouseButtonLeft
+        )
+        self.Quartz.CGEventPost(self.Quartz.kCGHIDEventTap, event)
+
+    def _post(self, event_type, button, position):
+        event = self.Quartz.CGEventCreateMouseEvent(
+            None,
+            event_type,
+            position,
+            self.button_types[button]
+        )
+        self.Quartz.CGEventPost(self.Quartz.kCGHIDEventTap, event)
+
+    def press(self, button, position):
+        self._post(self.down_types[button], button, position)
+
+    def release(self, button, position):
+        self._post(self.up_types[button], button, position)
+
+    def prepare(self, button, position):
+        Quartz = self.Quartz
+        down = Quartz.CGEventCreateMouseEvent(
+            None, self.down_types[button], position, self.button_types[button]
+        )
+        up = Quartz.CGEventCreateMouseEvent(
+            None, self.up_types[button], position, self.button_types[button]
+        )
+        return PreparedClick(button, position, down, up)
+
+    def reposition(self, prepared, position):
+        prepared.position = position
+        self.Quartz.CGEventSetLocation(prepared.down, position)
+        self.Quartz.CGEventSetLocation(prepared.up, position)
+
+    def post_down(self, prepared):
+        self.Quartz.CGEventPost(self.Quartz.kCGHIDEventTap, prepared.down)
+
+    def post_up(self, prepared):
+        self.Quartz.CGEventPost(self.Quartz.kCGHIDEventTap, prepared.up)
+
+    def post_burst(self, prepared, count):
+        Quartz = self.Quartz
+        set_field = Quartz.CGEventSetIntegerValueField
+        click_state = Quartz.kCGMouseEventClickState
+        post = Quartz.CGEventPost
+        tap = Quartz.kCGHIDEventTap
+        down, up = prepared.down, prepared.up
+
+        # Rapid clicks at one spot are multi-clicks, so number them 1..count
+        for state in range(1, count + 1):
+            set_field(down, click_state, state)
+            set_field(up, click_state, state)
+            post(tap, down)
+            post(tap, up)
+
+        # Restore single-click state for regular clicks
+        set_field(down, click_state, 1)
+        set_field(up, click_state, 1)
+
+
+class PynputBackend(ClickBackend):
+    """Portable backend built on pynput's mouse controller"""
+
+    name = "pynput"
+
+    def __init__(self):
+        try:
+            from pynput.mouse import Button, Controller as MouseController
+        except ImportError as e:
+            raise BackendUnavailable(f"pynput is not available: {e}")
+        self.mouse = MouseController()
+        self.buttons = {
+            "left": Button.left,
+            "right": Button.right,
+            "middle": Button.middle
+        }
+        # pynput clicks at the cursor, so it is moved to each new position
+        self.posted_position = None
+        self.lock = threading.Lock()
+
+    def get_position(self):
+        return self.mouse.position
+
+    def move(self, position):
+        with self.lock:
+            self.mouse.position = position
+            self.posted_position = position
+
+    def _post_button(self, post, button, position):
+        with self.lock:
+            if position != self.posted_position:
+                self.mouse.position = position
+                self.posted_position = position
+            post(self.buttons[button])
+
+    def press(self, button, position):
+        self._post_button(self.mouse.press, button, position)
+
+    def release(self, button, position):
+        self._post_button(self.mouse.release, button, position)
+
+
+class XTestBackend(ClickBackend):
+    """Linux/X11 backend calling libXtst directly through ctypes"""
+
+    name = "xtest"
+
+    def __init__(self):
+        # ctypes.util pulls in subprocess, so only load it when needed
+        import ctypes.util
+        x11_path = ctypes.util.find_library("X11")
+        xtst_path = ctypes.util.find_library("Xtst")
+        if not x11_path or not xtst_path:
+            raise BackendUnavailable("libX11/libXtst not found")
+
+        self.x11 = ctypes.cdll.LoadLibrary(x11_path)
+        self.xtst = ctypes.cdll.LoadLibrary(xtst_path)
+        self.x11.XOpenDisplay.restype = ctypes.c_void_p
+        self.x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.x11.XFlush.argtypes = [ctypes.c_void_p]
+        self.x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.xtst.XTestFakeButtonEvent.argtypes = [
+            ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong
+        ]
+        self.xtst.XTestFakeMotionEvent.argtypes = [
+            ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_ulong
+        ]
+
+        self.display = self.x11.XOpenDisplay(None)
+        if not self.display:
+            raise BackendUnavailable("Cannot open X display")
+        self.root_window = self.x11.XDefaultRootWindow(self.display)
+
+        # X11 button numbers
+        self.buttons = {"left": 1, "middle": 2, "right": 3}
+        # XTest clicks at the pointer, so it is moved to each new position
+        self.posted_position = None
+        # Xlib is not thread-safe without XInitThreads, so every use of the
+        # display goes through this lock
+        self.lock = threading.Lock()
+
+    def get_position(self):
+        root_return = ctypes.c_ulong()
+        child_return = ctypes.c_ulong()
+        root_x, root_y = ctypes.c_int(), ctypes.c_int()
+        win_x, win_y = ctypes.c_int(), ctypes.c_int()
+        mask = ctypes.c_uint()
+        with self.lock:
+            self.x11.XQueryPointer(
+                ctypes.c_void_p(self.display), ctypes.c_ulong(self.root_window),
+                ctypes.byref(root_return), ctypes.byref(child_return),
+                ctypes.byref(root_x), ctypes.byref(root_y),
+                ctypes.byref(win_x), ctypes.byref(win_y), ctypes.byref(mask)
+            )
+        return (root_x.value, root_y.value)
+
+    def move(self, position):
+        with self.lock:
+            self.xtst.XTestFakeMotionEvent(self.display, -1, int(position[0]), int(position[1]), 0)
+            self.x11.XFlush(self.display)
+            self.posted_position = position
+
+    def _post_button(self, button, is_press, position):
+        # The motion and button events go out with a single flush
+        with self.lock:
+            if position != self.posted_position:
+                self.xtst.XTestFakeMotionEvent(self.display, -1, int(position[0]), int(position[1]), 0)
+                self.posted_position = position
+            self.xtst.XTestFakeButtonEvent(self.display, self.buttons[button], is_press, 0)
+            self.x11.XFlush(self.display)
+
+    def press(self, button, position):
+        self._post_button(button, 1, position)
+
+    def release(self, button, position):
+        self._post_button(button, 0, position)
+
+    def close(self):
+        with self.lock:
+            if self.display:
+                self.x11.XCloseDisplay(self.display)
+                self.display = None
+
+
+class RecordingBackend(ClickBackend):
+    """In-memory backend that timestamps every event instead of posting it
+
+    Events are stored column-wise in preallocation-friendly arrays so that
+    recording a click costs about as much as posting one would, which keeps
+    headless throughput and jitter measurements representative.
+    """
+
+    name = "recording"
+
+    def __init__(self, position=(0, 0)):
+        self.position = position
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Discard all recorded events"""
+        self.times = array('d')
+        self.actions = array('B')
+        self.buttons = array('B')
+
+    def _record(self, action, button):
+        # Keep the columns aligned when two threads record at once
+        with self.lock:
+            self.times.append(time.perf_counter())
+            self.actions.append(action)
+            self.buttons.append(BUTTON_CODES[button])
+
+    def get_position(self):
+        return self.position
+
+    def move(self, position):
+        self.position = position
+        self._record(ACTION_MOVE, "left")
+
+    def press(self, button, position):
+        self._record(ACTION_DOWN, button)
+
+    def release(self, button, position):
+        self._record(ACTION_UP, button)
+
+    def timestamps(self, action):
+        """Return the timestamps of all recorded events of one action type"""
+        return [t for t, a in zip(self.times, self.actions) if a == action]
+
+    def count(self, action):
+        """Return how many events of one action type were recorded"""
+        return self.actions.count(action)
+
+
+class NullBackend(ClickBackend):
+    """Backend that discards every event, for measuring pure loop overhead"""
+
+    name = "null"
+
+    def __init__(self, position=(0, 0)):
+        self.position = position
+
+    def get_position(self):
+        return self.position
+
+    def move(self, position):
+        self.position = position
+
+    def press(self, button, position):
+        pass
+
+    def release(self, button, position):
+        pass
+
+
+class CursorTracker:
+    """Caches the cursor position from pynput move events
+
+    Reading the cached position is a plain attribute access, so the click
+    loop only pays for a position query when the mouse actually moved.
+    """
+
+    def __init__(self, position):
+        try:
+            from pynput.mouse import Listener as MouseListener
+        except ImportError as e:
+            raise BackendUnavailable(f"pynput is not available: {e}")
+        self.position = position
+        self.listener = MouseListener(on_move=self._on_move)
+
+    def _on_move(self, x, y):
+        self.position = (x, y)
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
+
+
+BACKENDS = {
+    "quartz": QuartzBackend,
+    "pynput": PynputBackend,
+    "xtest": XTestBackend,
+    "recording": RecordingBackend,
+    "null": NullBackend
+}
+
+
+def _platform_preference():
+    """Return backend names to try for "auto", lowest overhead first"""
+    if sys.platform == "darwin":
+        return ["quartz", "pynput"]
+    if sys.platform.startswith("linux"):
+        return ["xtest", "pynput"]
+    return ["pynput"]
+
+
+def create_backend(name="auto"):
+    """Create a click backend by name, or the best one for this platform"""
+    if name != "auto":
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown backend: {name}")
+        return BACKENDS[name]()
+
+    errors = []
+    for candidate in _platform_preference():
+        try:
+            return BACKENDS[candidate]()
+        except BackendUnavailable as e:
+            errors.append(f"{candidate}: {e}")
+
+    print(f"No native click backend available ({'; '.join(errors)}), using null backend")
+    return NullBackend()
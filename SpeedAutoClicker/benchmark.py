@@ -0,0 +1,198 @@
+"""
+Click engine benchmark
+
+Drives AutoClicker headlessly over a matrix of click intervals, duty cycles
+and burst sizes using the recording (or null) backend, and measures achieved
+CPS, lateness and inter-click jitter percentiles, CPU time and stop latency.
+Results are written as JSON and can be compared against a stored baseline so
+regressions are caught before release:
+
+    python3 SpeedAutoClicker/benchmark.py --output results.json --save-baseline baseline.json
+    python3 SpeedAutoClicker/benchmark.py --baseline baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from auto_clicker import AutoClicker
+from backends import ACTION_DOWN, RecordingBackend, NullBackend
+from telemetry import percentile
+
+
+def _jitter_stats(down_times, interval):
+    """Return inter-click interval deviation percentiles in ms"""
+    deviations = sorted(
+        abs((b - a) - interval) * 1000.0
+        for a, b in zip(down_times, down_times[1:])
+    )
+    return {
+        "jitter_p50_ms": percentile(deviations, 0.50),
+        "jitter_p99_ms": percentile(deviations, 0.99),
+        "jitter_max_ms": deviations[-1] if deviations else 0.0
+    }
+
+
+def run_case(clicker, interval_ms, duty_cycle, burst_size, duration):
+    """Run one benchmark case and return its measurements"""
+    clicker.update_config("click_interval_ms", interval_ms)
+    clicker.update_config("duty_cycle_percent", duty_cycle)
+    clicker.update_config("burst_size", burst_size)
+
+    backend = clicker.backend
+    if isinstance(backend, RecordingBackend):
+        backend.clear()
+
+    cpu_start = time.process_time()
+    clicker.start_clicking()
+    time.sleep(duration)
+
+    stop_start = time.perf_counter()
+    clicker.stop_clicking()
+    stop_latency = time.perf_counter() - stop_start
+    cpu_time = time.process_time() - cpu_start
+
+    status = clicker.get_status()
+    result = {
+        "interval_ms": interval_ms,
+        "duty_cycle_percent": duty_cycle,
+        "burst_size": burst_size,
+        "clicks": status["click_count"],
+        "target_cps": status["target_cps"],
+        "achieved_cps": status["achieved_cps"],
+        "cpu_time_s": cpu_time,
+        "cpu_percent": cpu_time / duration * 100.0,
+        "stop_latency_ms": stop_latency * 1000.0,
+        "skipped_slots": status["skipped_slots"]
+    }
+    result.update({k: v for k, v in status["timing"].items() if k.startswith("lateness")})
+
+    if isinstance(backend, RecordingBackend):
+        # Jitter is measured per slot, i.e. on the first click of each burst
+        down_times = backend.timestamps(ACTION_DOWN)[::burst_size]
+        result.update(_jitter_stats(down_times, interval_ms / 1000.0 * burst_size))
+
+    return result
+
+
+def run_benchmark(intervals, duty_cycles, bursts, duration, backend_name="recording"):
+    """Run the full benchmark matrix and return the results document"""
+    backend = RecordingBackend() if backend_name == "recording" else NullBackend()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clicker = AutoClicker(
+            os.path.join(tmp_dir, "config.json"),
+            backend=backend,
+            listen_hotkeys=False
+        )
+        clicker.update_config("position_mode", "locked")
+
+        cases = []
+        for interval_ms in intervals:
+            for duty_cycle in duty_cycles:
+                for burst_size in bursts:
+                    result = run_case(clicker, interval_ms, duty_cycle, burst_size, duration)
+                    print(
+                        f"interval={interval_ms}ms duty={duty_cycle}% burst={burst_size}: "
+                        f"{result['achieved_cps']:.1f}/{result['target_cps']:.1f} CPS, "
+                        f"p99 lateness {result['lateness_p99_ms']:.3f}ms, "
+                        f"CPU {result['cpu_percent']:.1f}%, "
+                        f"stop {result['stop_latency_ms']:.2f}ms"
+                    )
+                    cases.append(result)
+        clicker.cleanup()
+
+    return {
+        "timestamp": time.time(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "backend": backend.name,
+        "duration_s": duration,
+        "cases": cases
+    }
+
+
+def _case_key(case):
+    return (case["interval_ms"], case["duty_cycle_percent"], case["burst_size"])
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Return a list of regression messages against a baseline document
+
+    A case regresses when achieved CPS drops, or p99 lateness, CPU use or
+    stop latency rise, by more than tolerance (a fraction). Lateness and stop
+    latency also need to grow by at least 0.1 ms so timer noise on fast cases
+    is not reported.
+    """
+    baseline_cases = {_case_key(c): c for c in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        base = baseline_cases.get(_case_key(case))
+        if base is None:
+            continue
+        label = "interval={}ms duty={}% burst={}".format(*_case_key(case))
+
+        if case["achieved_cps"] < base["achieved_cps"] * (1 - tolerance):
+            regressions.append(
+                f"{label}: achieved CPS {case['achieved_cps']:.1f} < baseline {base['achieved_cps']:.1f}"
+            )
+        if case["cpu_percent"] > base["cpu_percent"] * (1 + tolerance) + 1.0:
+            regressions.append(
+                f"{label}: CPU {case['cpu_percent']:.1f}% > baseline {base['cpu_percent']:.1f}%"
+            )
+        for key in ("lateness_p99_ms", "stop_latency_ms"):
+            if case[key] > base[key] * (1 + tolerance) and case[key] - base[key] > 0.1:
+                regressions.append(f"{label}: {key} {case[key]:.3f} > baseline {base[key]:.3f}")
+    return regressions
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(",")]
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SpeedAutoClicker click engine")
+    parser.add_argument("--intervals", type=_float_list, default=[100.0, 10.0, 1.0, 0.1],
+                        help="comma-separated click intervals in ms")
+    parser.add_argument("--duty-cycles", type=_float_list, default=[50.0],
+                        help="comma-separated duty cycles in percent")
+    parser.add_argument("--bursts", type=_int_list, default=[1, 10],
+                        help="comma-separated burst sizes")
+    parser.add_argument("--duration", type=float, default=2.0,
+                        help="seconds to run each case")
+    parser.add_argument("--backend", choices=["recording", "null"], default="recording")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare results against this baseline JSON")
+    parser.add_argument("--save-baseline", help="also write results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.intervals, args.duty_cycles, args.bursts, args.duration, args.backend)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
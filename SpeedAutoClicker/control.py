@@ -0,0 +1,254 @@
+"""
+Local control API over a Unix domain socket
+
+ControlServer runs an asyncio server on a background thread so other
+automation can drive the clicker without the GUI. The protocol is
+line-delimited JSON: each request is one object with a "cmd" and an
+optional "id" that is echoed back in the response.
+
+    {"id": 1, "cmd": "start"}                     -> {"id": 1, "ok": true, "result": true}
+    {"cmd": "set", "key": "click_interval_ms", "value": 20}
+    {"cmd": "status"}
+    {"cmd": "subscribe", "interval_ms": 250}      -> stream of {"event": "stats", ...}
+    {"cmd": "unsubscribe"}
+
+Commands: start, stop, toggle, status, set, subscribe, unsubscribe.
+ControlClient is a small blocking client for the same protocol.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import threading
+from auto_clicker import config_with_update
+
+DEFAULT_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".speedautoclicker.sock")
+
+
+def stats_snapshot(auto_clicker):
+    """Return the compact stats record sent to subscribers"""
+    status = auto_clicker.get_status()
+    timing = status["timing"]
+    return {
+        "event": "stats",
+        "running": status["running"],
+        "click_count": status["click_count"],
+        "achieved_cps": status["achieved_cps"],
+        "lateness_p50_ms": timing["lateness_p50_ms"],
+        "lateness_p99_ms": timing["lateness_p99_ms"],
+        "lateness_max_ms": timing["lateness_max_ms"]
+    }
+
+
+class ControlServer:
+    """asyncio Unix socket server exposing the AutoClicker controls"""
+
+    def __init__(self, auto_clicker, path=DEFAULT_SOCKET_PATH):
+        self.auto_clicker = auto_clicker
+        self.path = path
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+        # Connection handler tasks, cancelled on stop
+        self.clients = set()
+
+    def start(self):
+        """Start serving on a background thread"""
+        if not hasattr(socket, "AF_UNIX"):
+            print("Unix domain sockets are not supported on this platform")
+            return False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout=5.0)
+        return self.server is not None
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            print(f"Control server error: {e}")
+        finally:
+            self.ready.set()
+            self.loop.close()
+
+    async def _serve(self):
+        # Remove a stale socket left behind by a previous run
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+        os.chmod(self.path, 0o600)
+        self.ready.set()
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+            # Let cancelled connections finish before the loop closes
+            if self.clients:
+                await asyncio.gather(*self.clients, return_exceptions=True)
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self.clients.add(task)
+        subscription = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    cmd = request.get("cmd")
+                    if cmd == "subscribe":
+                        interval = max(float(request.get("interval_ms", 250.0)), 10.0) / 1000.0
+                        if subscription:
+                            subscription.cancel()
+                        subscription = asyncio.ensure_future(self._stream_stats(writer, interval))
+                        result = True
+                    elif cmd == "unsubscribe":
+                        if subscription:
+                            subscription.cancel()
+                            subscription = None
+                        result = True
+                    else:
+                        result = await self._execute(cmd, request)
+                    response = {"id": request.get("id"), "ok": True, "result": result}
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # A bad request never takes the connection down
+                    request_id = request.get("id") if isinstance(request, dict) else None
+                    response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+                self._send(writer, response)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        except ValueError as e:
+            # readline() raises this for lines over the stream limit
+            print(f"Control client error: {e}")
+        finally:
+            if subscription:
+                subscription.cancel()
+                await asyncio.gather(subscription, return_exceptions=True)
+            writer.close()
+            self.clients.discard(task)
+
+    def _send(self, writer, message):
+        writer.write(json.dumps(message).encode() + b"\n")
+
+    async def _execute(self, cmd, request):
+        """Run one engine command; blocking ones go to the default executor"""
+        auto_clicker = self.auto_clicker
+        loop = asyncio.get_running_loop()
+        if cmd == "start":
+            # start_clicking can wait for the previous session to finish
+            return await loop.run_in_executor(None, auto_clicker.start_clicking)
+        if cmd == "stop":
+            # stop_clicking joins the click thread, so keep it off the loop
+            return await loop.run_in_executor(None, auto_clicker.stop_clicking)
+        if cmd == "toggle":
+            return await loop.run_in_executor(None, auto_clicker.toggle_clicking)
+        if cmd == "status":
+            return stats_snapshot(auto_clicker)
+        if cmd == "set":
+            # Validate first so the error can be reported to the client
+            config_with_update(auto_clicker.config, request["key"], request["value"])
+            return auto_clicker.update_config(
+                request["key"], request["value"], bool(request.get("persist", True))
+            )
+        raise ValueError(f"Unknown command: {cmd}")
+
+    async def _stream_stats(self, writer, interval):
+        try:
+            while True:
+                self._send(writer, stats_snapshot(self.auto_clicker))
+                await writer.drain()
+                await asyncio.sleep(interval)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    def _shutdown(self):
+        self.server.close()
+        for task in self.clients:
+            task.cancel()
+
+    def stop(self):
+        """Stop the server, close client connections and remove the socket file"""
+        if self.loop and self.server:
+            try:
+                self.loop.call_soon_threadsafe(self._shutdown)
+            except RuntimeError:
+                # The loop already stopped on an error
+                pass
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        if self.server and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class ControlClient:
+    """Blocking client for the control socket"""
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, timeout=5.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile('rb')
+        self.next_id = 0
+
+    def _read(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Control socket closed")
+        return json.loads(line)
+
+    def request(self, cmd, **params):
+        """Send one command and return its result, raising on errors"""
+        self.next_id += 1
+        params.update(cmd=cmd, id=self.next_id)
+        self.sock.sendall(json.dumps(params).encode() + b"\n")
+        while True:
+            response = self._read()
+            # Skip stats events interleaved with responses
+            if response.get("event") == "stats":
+                continue
+            if response.get("id") != self.next_id:
+                continue
+            if not response["ok"]:
+                raise RuntimeError(response["error"])
+            return response["result"]
+
+    def start(self):
+        return self.request("start")
+
+    def stop(self):
+        return self.request("stop")
+
+    def toggle(self):
+        return self.request("toggle")
+
+    def status(self):
+        return self.request("status")
+
+    def set(self, key, value, persist=True):
+        return self.request("set", key=key, value=value, persist=persist)
+
+    def stats(self, interval_ms=250.0):
+        """Subscribe and yield stats records until the caller stops iterating"""
+        self.request("subscribe", interval_ms=interval_ms)
+        self.sock.settimeout(None)
+        while True:
+            message = self._read()
+            if message.get("event") == "stats":
+                yield message
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
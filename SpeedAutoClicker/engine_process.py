@@ -0,0 +1,588 @@
+"""
+Click engine in a separate process
+
+The spinning click loop shares the GIL with the hotkey listener and the Tk
+event loop when everything runs in one process. ProcessAutoClicker keeps the
+same interface as AutoClicker but runs the real engine in a child process,
+optionally pinned to CPUs and with a different priority. Commands go to the
+child over a pipe; counters come back through a shared memory block that the
+child republishes every few milliseconds, so get_status() in the UI process
+is a lock-free read. The child only copies its raw counters and timestamp
+arrays into the block; percentiles and summaries are computed by the reader,
+keeping that work off the engine's GIL.
+
+The status block is guarded by a sequence counter (a seqlock): the writer
+makes it odd while updating and even when done, and readers retry if it
+changed or was odd while they copied the block.
+"""
+
+import copy
+import json
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+from auto_clicker import DEFAULT_CONFIG, HOTKEY_KEYS, KeyboardListener, config_with_update, merge_defaults
+from hotkeys import HotkeyMatcher
+from profiles import PROFILE_KEYS, apply_profile, base_settings, profile_overlay
+from profiling import PHASES, PhaseCounters
+from telemetry import ClickTelemetry, LatencyHistogram
+
+# seq, running, click_count, skipped_slots, throttled_slots,
+# allocations_avoided, telemetry count, clicks per telemetry sample,
+# target_cps, session start, session end, spin_margin_ms, telemetry
+# interval, duty cycle, length of the JSON tail
+HEADER = struct.Struct("<QQQQQQQQddddddI")
+SEQ = struct.Struct("<Q")
+# Latency histogram sample count, total and max (ms), before its bucket counts
+HISTOGRAM = struct.Struct("<Qdd")
+# Backend name, stop reason, trigger state and per-stream counters, as JSON
+EXTRA_SIZE = 8192
+
+
+class StatusLayout:
+    """Offsets of the parts of the shared status block
+
+    After the header come the raw telemetry ring buffers, the phase counter
+    arrays and the three latency histograms, then the JSON tail. The engine
+    only copies these; sorting and formatting happen in the reader.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        offset = HEADER.size
+        self.telemetry = []
+        for _ in range(3):
+            self.telemetry.append(offset)
+            offset += 8 * capacity
+        self.phase_totals = offset
+        offset += 8 * len(PHASES)
+        self.phase_counts = offset
+        offset += 8 * len(PHASES)
+        self.histograms = []
+        bucket_bytes = array('L').itemsize * (len(LatencyHistogram.BOUNDS_MS) + 1)
+        for _ in range(3):
+            self.histograms.append(offset)
+            offset += HISTOGRAM.size + bucket_bytes
+        self.extra = offset
+        self.size = offset + EXTRA_SIZE
+
+
+# Engine methods the UI process may invoke
+COMMANDS = (
+    "start_clicking", "stop_clicking", "toggle_clicking", "update_config",
+    "start_macro", "toggle_macro", "start_replay", "start_recording", "stop_recording",
+    "select_profile"
+)
+
+
+def process_mode_enabled(config_path):
+    """Return True if the config asks for the engine to run in its own process"""
+    try:
+        with open(config_path, 'r') as f:
+            return bool(json.load(f).get("engine_process", {}).get("enabled", False))
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def _optional(value):
+    return math.nan if value is None else float(value)
+
+
+def _from_optional(value):
+    return None if math.isnan(value) else value
+
+
+def _raw(values):
+    return memoryview(values).cast('B')
+
+
+def _histograms(auto_clicker):
+    return (auto_clicker.first_click_latency, auto_clicker.last_click_latency,
+            auto_clicker.trigger_latency)
+
+
+def publish_status(buf, layout, auto_clicker, last_extra=None):
+    """Copy the engine's raw counters into the shared block
+
+    Only memory copies happen here, so publishing takes little GIL time
+    from the click loop. The JSON tail is re-encoded only when it changed.
+    Returns the (dict, bytes) tail to pass back in as last_extra.
+    """
+    ac = auto_clicker
+    extra = {
+        "backend": ac.backend.name,
+        "stop_reason": ac.stop_reason,
+        "trigger": ac.trigger.get_status() if ac.trigger else None,
+        "streams": ac.streams.get_status()
+    }
+    if last_extra is not None and last_extra[0] == extra:
+        data = last_extra[1]
+    else:
+        data = json.dumps(extra).encode()
+        if len(data) > EXTRA_SIZE:
+            extra["streams"] = {}
+            data = json.dumps(extra).encode()
+    telemetry = ac.telemetry
+    scheduler = ac.scheduler
+
+    seq = SEQ.unpack_from(buf, 0)[0]
+    SEQ.pack_into(buf, 0, seq + 1)
+    HEADER.pack_into(
+        buf, 0, seq + 1,
+        ac.running, ac.click_count,
+        scheduler.skipped if scheduler else 0,
+        scheduler.throttled if scheduler else 0,
+        ac.allocations_avoided, telemetry.count, telemetry.clicks_per_sample,
+        1.0 / ac.plan.interval, _optional(ac.session_start), _optional(ac.session_end),
+        _optional(ac.waiter.margin_ms if ac.waiter else None),
+        telemetry.interval, _optional(telemetry.duty_cycle), len(data)
+    )
+    for offset, values in zip(layout.telemetry, (telemetry.scheduled, telemetry.down, telemetry.up)):
+        raw = _raw(values)
+        buf[offset:offset + len(raw)] = raw
+    raw = _raw(ac.phase_counters.totals)
+    buf[layout.phase_totals:layout.phase_totals + len(raw)] = raw
+    raw = _raw(ac.phase_counters.counts)
+    buf[layout.phase_counts:layout.phase_counts + len(raw)] = raw
+    for offset, histogram in zip(layout.histograms, _histograms(ac)):
+        HISTOGRAM.pack_into(buf, offset, histogram.count, histogram.total_ms, histogram.max_ms)
+        raw = _raw(histogram.counts)
+        offset += HISTOGRAM.size
+        buf[offset:offset + len(raw)] = raw
+    buf[layout.extra:layout.extra + len(data)] = data
+    SEQ.pack_into(buf, 0, seq + 2)
+    return extra, data
+
+
+def read_status(buf, size, retries=100):
+    """Return a consistent copy of the first size bytes of the block"""
+    for _ in range(retries):
+        seq = SEQ.unpack_from(buf, 0)[0]
+        if seq & 1:
+            continue
+        data = bytes(buf[:size])
+        if SEQ.unpack_from(buf, 0)[0] == seq:
+            return data
+    raise RuntimeError("Engine status is being updated too often to read")
+
+
+def apply_scheduling(cpu_affinity, nice):
+    """Pin the current process to CPUs and change its priority where permitted"""
+    if cpu_affinity:
+        if hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, cpu_affinity)
+            except OSError as e:
+                print(f"Cannot set CPU affinity: {e}")
+        else:
+            print("CPU affinity is not supported on this platform")
+    if nice:
+        # Negative values raise the priority and usually need privileges
+        try:
+            os.nice(nice)
+        except OSError as e:
+            print(f"Cannot change process priority: {e}")
+
+
+def run_engine(config_path, backend_name, conn, shm_name, settings):
+    """Child process entry point: run an AutoClicker driven over conn"""
+    apply_scheduling(settings["cpu_affinity"], settings["nice"])
+
+    from auto_clicker import AutoClicker
+    from backends import create_backend
+
+    backend = create_backend(backend_name) if backend_name else None
+    auto_clicker = AutoClicker(config_path, backend=backend, listen_hotkeys=False)
+    # The block is sized for the ring buffer capacity the parent read
+    layout = StatusLayout(settings["telemetry_capacity"])
+    if auto_clicker.telemetry.capacity != layout.capacity:
+        auto_clicker.telemetry = ClickTelemetry(layout.capacity, settings["telemetry_window"])
+    from multiprocessing import shared_memory
+    # Spawned children share the parent's resource tracker, so attaching
+    # here does not risk the block being unlinked when this process exits
+    shm = shared_memory.SharedMemory(name=shm_name)
+    send_lock = threading.Lock()
+    publish_lock = threading.Lock()
+
+    last_extra = [None]
+
+    def publish():
+        with publish_lock:
+            last_extra[0] = publish_status(shm.buf, layout, auto_clicker, last_extra[0])
+
+    def on_status(status):
+        # Publish state changes at once instead of at the next tick
+        publish()
+        with send_lock:
+            conn.send(("status", status))
+
+    auto_clicker.add_status_listener(on_status)
+    publish()
+
+    closed = threading.Event()
+    interval = settings["publish_interval_ms"] / 1000.0
+
+    def publisher():
+        while not closed.wait(interval):
+            publish()
+
+    publisher_thread = threading.Thread(target=publisher, daemon=True)
+    publisher_thread.start()
+
+    with send_lock:
+        conn.send(("ready", auto_clicker.backend.name))
+    try:
+        while True:
+            try:
+                command, args = conn.recv()
+            except EOFError:
+                break
+            if command == "close":
+                break
+            try:
+                if command == "hotkey":
+                    action, pressed = args
+                    callback = auto_clicker.hotkey_action(action)[0 if pressed else 1]
+                    if callback:
+                        callback()
+                elif command in COMMANDS:
+                    getattr(auto_clicker, command)(*args)
+                else:
+                    print(f"Unknown engine command: {command}")
+            except Exception as e:
+                print(f"Error running engine command {command}: {e}")
+    finally:
+        closed.set()
+        publisher_thread.join(timeout=1.0)
+        auto_clicker.cleanup()
+        shm.close()
+
+
+class ProcessAutoClicker:
+    """AutoClicker interface backed by an engine running in a child process"""
+
+    def __init__(self, config_path, backend=None, listen_hotkeys=True):
+        import multiprocessing
+        from multiprocessing import shared_memory
+
+        self.config_path = config_path
+        self.load_config()
+        # Profiles overlay these settings, as in the engine
+        self.profile_base = base_settings(self.config)
+        self.config["profile_base"] = self.profile_base
+        settings = dict(self.config["engine_process"])
+        telemetry = self.config["telemetry"]
+        settings["telemetry_capacity"] = telemetry["buffer_size"]
+        settings["telemetry_window"] = telemetry["window"]
+
+        # Mirrors of the engine's counters, filled from the shared block and
+        # summarized here so the engine process never sorts or formats them
+        self.layout = StatusLayout(telemetry["buffer_size"])
+        self.telemetry = ClickTelemetry(telemetry["buffer_size"], telemetry["window"])
+        self.phase_counters = PhaseCounters()
+        self.histograms = [LatencyHistogram() for _ in range(3)]
+        self.mirror_lock = threading.Lock()
+
+        self.status_listeners = []
+        self.control_server = None
+        self.backend_name = None
+
+        # New blocks are zero-filled: sequence 0, engine idle
+        self.shm = shared_memory.SharedMemory(create=True, size=self.layout.size)
+
+        # spawn avoids forking a process that already runs listener threads
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.send_lock = threading.Lock()
+        self.process = context.Process(
+            target=run_engine,
+            args=(config_path, backend, child_conn, self.shm.name, settings),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        # Wait for the engine so startup errors surface here
+        ready = threading.Event()
+        self.reader_thread = threading.Thread(target=self._read_events, args=(ready,), daemon=True)
+        self.reader_thread.start()
+        if not ready.wait(timeout=30.0):
+            self.cleanup()
+            raise RuntimeError("Engine process did not start")
+
+        # Hotkeys are matched here and forwarded as actions, keeping the
+        # keyboard hook out of the engine process
+        self.hotkeys = HotkeyMatcher()
+        self.compile_hotkeys()
+        self.keyboard_listener = None
+        if listen_hotkeys:
+            self.setup_keyboard_listener()
+
+    def load_config(self):
+        """Load the configuration; the engine process owns saving it"""
+        try:
+            with open(self.config_path, 'r') as f:
+                self.config = merge_defaults(json.load(f), DEFAULT_CONFIG)
+        except (OSError, ValueError) as e:
+            print(f"Error loading config: {e}")
+            self.config = merge_defaults({}, DEFAULT_CONFIG)
+
+    def _read_events(self, ready):
+        while True:
+            try:
+                event, payload = self.conn.recv()
+            except (EOFError, OSError):
+                ready.set()
+                return
+            if event == "ready":
+                self.backend_name = payload
+                ready.set()
+            elif event == "status":
+                # Profiles switched by hotkey change the engine's settings first
+                if payload["profile"] != self.config["active_profile"]:
+                    self._mirror_profile(payload["profile"])
+                for callback in self.status_listeners:
+                    try:
+                        callback(payload)
+                    except Exception as e:
+                        print(f"Error in status listener: {e}")
+
+    def _send(self, command, *args):
+        try:
+            with self.send_lock:
+                self.conn.send((command, args))
+        except (OSError, ValueError) as e:
+            print(f"Error sending {command} to the engine process: {e}")
+            return False
+        return True
+
+    def _header(self):
+        return HEADER.unpack_from(read_status(self.shm.buf, HEADER.size), 0)
+
+    @property
+    def running(self):
+        return bool(self._header()[1])
+
+    @property
+    def click_count(self):
+        return self._header()[2]
+
+    def _achieved_cps(self, fields):
+        start, end = _from_optional(fields[9]), _from_optional(fields[10])
+        if start is None:
+            return 0.0
+        # perf_counter is a system-wide clock, so the engine's times apply here
+        elapsed = (end if end is not None else time.perf_counter()) - start
+        return fields[2] / elapsed if elapsed > 0 else 0.0
+
+    def get_achieved_cps(self):
+        """Return the click rate achieved by the current or last session"""
+        return self._achieved_cps(self._header())
+
+    def get_status(self):
+        """Get the current status from the shared block without locking the engine"""
+        layout = self.layout
+        data = read_status(self.shm.buf, layout.size)
+        fields = HEADER.unpack_from(data, 0)
+        extra_len = fields[-1]
+        if extra_len:
+            extra = json.loads(data[layout.extra:layout.extra + extra_len])
+        else:
+            extra = {"backend": self.backend_name, "stop_reason": None, "trigger": None, "streams": {}}
+
+        with self.mirror_lock:
+            telemetry = self.telemetry
+            for offset, values in zip(layout.telemetry, (telemetry.scheduled, telemetry.down, telemetry.up)):
+                raw = _raw(values)
+                raw[:] = data[offset:offset + len(raw)]
+            telemetry.count = fields[6]
+            telemetry.clicks_per_sample = fields[7]
+            telemetry.interval = fields[12]
+            telemetry.duty_cycle = _from_optional(fields[13])
+            counters = self.phase_counters
+            raw = _raw(counters.totals)
+            raw[:] = data[layout.phase_totals:layout.phase_totals + len(raw)]
+            raw = _raw(counters.counts)
+            raw[:] = data[layout.phase_counts:layout.phase_counts + len(raw)]
+            for offset, histogram in zip(layout.histograms, self.histograms):
+                histogram.count, histogram.total_ms, histogram.max_ms = HISTOGRAM.unpack_from(data, offset)
+                raw = _raw(histogram.counts)
+                offset += HISTOGRAM.size
+                raw[:] = data[offset:offset + len(raw)]
+            timing = telemetry.summary()
+            phases = counters.summary()
+            first_click, last_click, trigger = (h.summary() for h in self.histograms)
+
+        return {
+            "running": bool(fields[1]),
+            "click_count": fields[2],
+            "target_cps": fields[8],
+            "achieved_cps": self._achieved_cps(fields),
+            "backend": extra["backend"],
+            "spin_margin_ms": _from_optional(fields[11]),
+            "skipped_slots": fields[3],
+            "throttled_slots": fields[4],
+            "stop_reason": extra["stop_reason"],
+            "phases": phases,
+            "allocations_avoided": fields[5],
+            "timing": timing,
+            "latency": {
+                "first_click": first_click,
+                "last_click": last_click,
+                "trigger": trigger
+            },
+            "trigger": extra["trigger"],
+            "streams": extra["streams"],
+            "config": self.config
+        }
+
+    def add_status_listener(self, callback):
+        """Register callback(status) for running-state changes
+
+        Callbacks run on the thread reading events from the engine process.
+        """
+        self.status_listeners.append(callback)
+
+    def update_config(self, key, value, persist=True):
+        """Update a configuration value here and in the engine process
+
+        Invalid changes are rejected here, before anything is sent.
+        """
+        try:
+            config_with_update(self.config, key, value)
+        except ValueError as e:
+            print(f"Rejected setting {key}: {e}")
+            return False
+        parts = key.split(".")
+        if len(parts) == 2:
+            self.config[parts[0]][parts[1]] = value
+        else:
+            self.config[key] = value
+        if parts[0] in PROFILE_KEYS:
+            self.profile_base[parts[0]] = copy.deepcopy(self.config[parts[0]])
+        elif parts[0] == "profile_base":
+            self.profile_base = base_settings(self.config)
+            self.config["profile_base"] = self.profile_base
+        if parts[0] in HOTKEY_KEYS:
+            self.compile_hotkeys()
+        return self._send("update_config", key, value, persist)
+
+    def _mirror_profile(self, name):
+        """Apply a profile's settings to the local copy of the config"""
+        profile = self.config["profiles"].get(name)
+        if profile is None:
+            print(f"Unknown profile: {name}")
+            return False
+        try:
+            overlay = profile_overlay(self.profile_base, profile)
+            apply_profile(self.config, self.profile_base, overlay)
+        except ValueError as e:
+            print(f"Ignoring profile {name}: {e}")
+            return False
+        self.config["active_profile"] = name
+        return True
+
+    def select_profile(self, name):
+        """Switch profiles here and in the engine process"""
+        return self._mirror_profile(name) and self._send("select_profile", name)
+
+    def start_clicking(self):
+        """Start the auto clicking process"""
+        started = not self.running
+        self._send("start_clicking")
+        return started
+
+    def stop_clicking(self):
+        """Stop the auto clicking process"""
+        stopped = self.running
+        self._send("stop_clicking")
+        return stopped
+
+    def toggle_clicking(self):
+        """Toggle the auto clicker on/off"""
+        return self._send("toggle_clicking")
+
+    def start_macro(self, name, speed=1.0):
+        return self._send("start_macro", name, speed)
+
+    def toggle_macro(self, name):
+        return self._send("toggle_macro", name)
+
+    def start_replay(self, path, speed=1.0, replay_keys=False):
+        return self._send("start_replay", path, speed, replay_keys)
+
+    def start_recording(self, path):
+        return self._send("start_recording", path)
+
+    def stop_recording(self):
+        return self._send("stop_recording")
+
+    def _hotkey_callbacks(self, action):
+        return (lambda: self._send("hotkey", action, True),
+                lambda: self._send("hotkey", action, False))
+
+    def compile_hotkeys(self):
+        """Compile hotkeys into the matcher; actions run in the engine process"""
+        mode = "hold" if self.config["activation_mode"] == "hold" else "toggle"
+        bindings = [(self.config["hotkey"],) + self._hotkey_callbacks(mode)]
+        for spec in self.config["streams"]:
+            if spec.get("hotkey") and "name" in spec:
+                bindings.append((spec["hotkey"],) + self._hotkey_callbacks(f"stream:{spec['name']}"))
+        for spec, action in self.config["hotkey_bindings"].items():
+            bindings.append((spec,) + self._hotkey_callbacks(action))
+        self.hotkeys.compile(bindings)
+
+    def setup_keyboard_listener(self):
+        """Setup keyboard listener for hotkey detection"""
+        if KeyboardListener is None:
+            print("Keyboard listener unavailable, hotkeys disabled")
+            return
+
+        hotkeys = self.hotkeys
+
+        def on_press(key):
+            callback = hotkeys.press(key)
+            if callback:
+                callback()
+
+        def on_release(key):
+            callback = hotkeys.release(key)
+            if callback:
+                callback()
+
+        self.keyboard_listener = KeyboardListener(on_press=on_press, on_release=on_release)
+        self.keyboard_listener.start()
+
+    def start_control_server(self, path=None):
+        """Serve the control API on a Unix domain socket"""
+        from control import ControlServer, DEFAULT_SOCKET_PATH
+
+        if self.control_server:
+            return True
+        server = ControlServer(self, path or DEFAULT_SOCKET_PATH)
+        if not server.start():
+            print(f"Error starting control server on {server.path}")
+            return False
+        self.control_server = server
+        return True
+
+    def cleanup(self):
+        """Stop the engine process and release the shared block"""
+        if self.control_server:
+            self.control_server.stop()
+        if getattr(self, "keyboard_listener", None):
+            self.keyboard_listener.stop()
+        self._send("close")
+        self.process.join(timeout=3.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        self.conn.close()
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
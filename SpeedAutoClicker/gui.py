@@ -1,13 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import webbrowser
-import os
-import json
-from PIL import Image, ImageTk
-import threading
-import time
+import queue
 
 class AutoClickerGUI:
+    # Refresh rate of the live click readout while clicking
+    LIVE_REFRESH_MS = 200
+    # How often the status queue is drained while idle
+    IDLE_POLL_MS = 250
+
     def __init__(self, root, auto_clicker):
         self.root = root
         self.auto_clicker = auto_clicker
@@ -22,8 +22,12 @@ class AutoClickerGUI:
         self.main_frame = ttk.Frame(self.root, padding="20")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Set while _render_profile fills in fields the engine already holds
+        self.rendering = False
+
         # Create UI elements
         self._create_title_section()
+        self._create_profile_section()
         self._create_click_rate_section()
         self._create_duty_cycle_section()
         self._create_mouse_button_section()
@@ -32,9 +36,15 @@ class AutoClickerGUI:
         self._create_status_section()
         self._create_discord_section()
         
-        # Status update thread
-        self.status_thread = threading.Thread(target=self._update_status_loop, daemon=True)
-        self.status_thread.start()
+        # Status changes arrive from engine threads through this queue and are
+        # rendered on the Tk thread only
+        self.status_queue = queue.Queue()
+        self.shown_running = None
+        self.shown_readout = None
+        self.shown_profile = self.config["active_profile"]
+        self.auto_clicker.add_status_listener(self.status_queue.put)
+        self._render_running(self.auto_clicker.running)
+        self.root.after(self.IDLE_POLL_MS, self._poll_status)
         
         # Bind window close event
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -58,6 +68,51 @@ class AutoClickerGUI:
         )
         subtitle_label.pack()
     
+    def _create_profile_section(self):
+        """Create the profile selector, shown only when profiles are configured"""
+        self.profile_var = tk.StringVar(value=self.config["active_profile"])
+        if not self.config["profiles"]:
+            return
+
+        frame = ttk.LabelFrame(self.main_frame, text="Profile", padding=10)
+        frame.pack(fill=tk.X, pady=5)
+        # Make room for the extra section in the fixed-size window
+        self.root.geometry("500x670")
+
+        profile_box = ttk.Combobox(
+            frame,
+            textvariable=self.profile_var,
+            values=list(self.config["profiles"]),
+            state="readonly",
+            width=20
+        )
+        profile_box.pack(side=tk.LEFT)
+
+        def select_profile(event):
+            if self.auto_clicker.select_profile(self.profile_var.get()):
+                self._render_profile(self.profile_var.get())
+
+        profile_box.bind("<<ComboboxSelected>>", select_profile)
+
+    def _render_profile(self, name):
+        """Show the settings of a newly selected profile"""
+        self.shown_profile = name
+        self.profile_var.set(name)
+        self.rendering = True
+        try:
+            self.interval_var.set(str(self.config["click_interval_ms"]))
+            self.duty_var.set(str(self.config["duty_cycle_percent"]))
+            self.button_var.set(self.config["mouse_button"])
+            self.limit_enabled_var.set(self.config["click_limit"]["enabled"])
+            self.limit_count_var.set(str(self.config["click_limit"]["count"]))
+        finally:
+            self.rendering = False
+
+    def _set_config(self, key, value):
+        """Pass a setting edited in the window on to the engine"""
+        if not self.rendering:
+            self.auto_clicker.update_config(key, value)
+
     def _create_click_rate_section(self):
         """Create the click rate section of the GUI"""
         frame = ttk.LabelFrame(self.main_frame, text="Click Rate", padding=10)
@@ -89,7 +144,7 @@ class AutoClickerGUI:
                 if interval > 0:
                     cps = 1000 / interval
                     self.cps_var.set(f"{cps:.2f}")
-                    self.auto_clicker.update_config("click_interval_ms", interval)
+                    self._set_config("click_interval_ms", interval)
             except ValueError:
                 pass
         
@@ -132,14 +187,14 @@ class AutoClickerGUI:
         def update_duty_from_slider(*args):
             value = self.duty_slider.get()
             self.duty_var.set(f"{value:.2f}")
-            self.auto_clicker.update_config("duty_cycle_percent", value)
+            self._set_config("duty_cycle_percent", value)
         
         def update_slider_from_duty(*args):
             try:
                 value = float(self.duty_var.get())
                 if 1 <= value <= 99:
                     self.duty_slider.set(value)
-                    self.auto_clicker.update_config("duty_cycle_percent", value)
+                    self._set_config("duty_cycle_percent", value)
             except ValueError:
                 pass
         
@@ -168,7 +223,7 @@ class AutoClickerGUI:
         
         # Update config when button changes
         def update_button(*args):
-            self.auto_clicker.update_config("mouse_button", self.button_var.get())
+            self._set_config("mouse_button", self.button_var.get())
         
         self.button_var.trace_add("write", update_button)
     
@@ -282,13 +337,13 @@ class AutoClickerGUI:
         
         # Update config when limit settings change
         def update_limit_enabled(*args):
-            self.auto_clicker.update_config("click_limit.enabled", self.limit_enabled_var.get())
+            self._set_config("click_limit.enabled", self.limit_enabled_var.get())
         
         def update_limit_count(*args):
             try:
                 count = int(self.limit_count_var.get())
                 if count > 0:
-                    self.auto_clicker.update_config("click_limit.count", count)
+                    self._set_config("click_limit.count", count)
             except ValueError:
                 pass
         
@@ -323,6 +378,15 @@ class AutoClickerGUI:
         
         self.click_counter_var = tk.StringVar(value="0")
         ttk.Label(counter_frame, textvariable=self.click_counter_var).pack(side=tk.LEFT, padx=5)
+
+        # Achieved click rate
+        achieved_frame = ttk.Frame(frame)
+        achieved_frame.pack(fill=tk.X)
+
+        ttk.Label(achieved_frame, text="Achieved CPS:").pack(side=tk.LEFT)
+
+        self.achieved_cps_var = tk.StringVar(value="0.00")
+        ttk.Label(achieved_frame, textvariable=self.achieved_cps_var).pack(side=tk.LEFT, padx=5)
         
         # Control buttons
         button_frame = ttk.Frame(frame)
@@ -360,49 +424,72 @@ class AutoClickerGUI:
         discord_button = ttk.Button(
             frame,
             text="Join my Discord",
-            command=lambda: webbrowser.open("https://discord.gg/MxGV8fGzpR")
+            command=self._open_discord
         )
         discord_button.pack()
     
+    def _open_discord(self):
+        """Open the Discord invite in the default browser"""
+        # Imported on demand; only needed when the button is clicked
+        import webbrowser
+        webbrowser.open("https://discord.gg/MxGV8fGzpR")
+
     def _start_clicking(self):
         """Start the auto clicker"""
         if self.auto_clicker.start_clicking():
+            self._render_running(True)
+
+    def _stop_clicking(self):
+        """Stop the auto clicker"""
+        if self.auto_clicker.stop_clicking():
+            self._render_running(False)
+            self._render_readout(self.auto_clicker.click_count, self.auto_clicker.get_achieved_cps())
+
+    def _render_running(self, running):
+        """Update the status indicator and buttons if the state changed"""
+        if running == self.shown_running:
+            return
+        self.shown_running = running
+        if running:
             self.status_var.set("Active")
             self.status_label.config(foreground="green")
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
-    
-    def _stop_clicking(self):
-        """Stop the auto clicker"""
-        if self.auto_clicker.stop_clicking():
+        else:
             self.status_var.set("Inactive")
             self.status_label.config(foreground="red")
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
-    
-    def _update_status_loop(self):
-        """Update the status display periodically"""
-        while True:
-            status = self.auto_clicker.get_status()
-            
-            # Update status text and color
-            if status["running"]:
-                self.status_var.set("Active")
-                self.status_label.config(foreground="green")
-                self.start_button.config(state=tk.DISABLED)
-                self.stop_button.config(state=tk.NORMAL)
-            else:
-                self.status_var.set("Inactive")
-                self.status_label.config(foreground="red")
-                self.start_button.config(state=tk.NORMAL)
-                self.stop_button.config(state=tk.DISABLED)
-            
-            # Update click counter
-            self.click_counter_var.set(str(status["click_count"]))
-            
-            # Sleep for a short time before updating again
-            time.sleep(0.1)
-    
+
+    def _render_readout(self, click_count, achieved_cps):
+        """Update the click counter and achieved CPS if they changed"""
+        readout = (str(click_count), f"{achieved_cps:.2f}")
+        if readout == self.shown_readout:
+            return
+        self.shown_readout = readout
+        self.click_counter_var.set(readout[0])
+        self.achieved_cps_var.set(readout[1])
+
+    def _poll_status(self):
+        """Render queued status changes and, while clicking, the live readout"""
+        try:
+            while True:
+                status = self.status_queue.get_nowait()
+                # Profiles can also be switched by hotkey
+                if status["profile"] != self.shown_profile:
+                    self._render_profile(status["profile"])
+                self._render_running(status["running"])
+                self._render_readout(status["click_count"], status["achieved_cps"])
+        except queue.Empty:
+            pass
+
+        # Throttled live readout; plain attribute reads, no engine locks
+        if self.shown_running:
+            self._render_readout(self.auto_clicker.click_count, self.auto_clicker.get_achieved_cps())
+            self.root.after(self.LIVE_REFRESH_MS, self._poll_status)
+        else:
+            self.root.after(self.IDLE_POLL_MS, self._poll_status)
+
     def _on_close(self):
         """Handle window close event"""
         # Stop the auto clicker if it's running
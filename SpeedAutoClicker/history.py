@@ -0,0 +1,158 @@
+"""
+Session history log
+
+When a session ends, the click worker hands a summary of it to a background
+thread that appends it to a JSON-lines file, so the file I/O never delays
+the worker. When the file grows past max_bytes it is rotated like a
+logging RotatingFileHandler (history.jsonl -> history.jsonl.1 -> ...).
+
+iter_sessions streams records one line at a time, oldest first, across the
+rotated files, and aggregate folds them into totals without ever holding
+more than one record in memory.
+
+    python history.py [path]     # print aggregate statistics
+"""
+
+import json
+import os
+import queue
+import threading
+
+
+class SessionHistory:
+    """Append-only JSON-lines log of session summaries with size-based rotation"""
+
+    def __init__(self, path, max_bytes=1024 * 1024, backup_count=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.write_count = 0
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def record(self, summary):
+        """Queue one session summary (a JSON-serializable dict) for writing"""
+        self.queue.put(summary)
+
+    def _run(self):
+        while True:
+            summary = self.queue.get()
+            if summary is None:
+                return
+            try:
+                self._append(json.dumps(summary, separators=(",", ":")) + "\n")
+            except Exception as e:
+                print(f"Error writing session history: {e}")
+
+    def _append(self, line):
+        data = line.encode()
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        self.write_count += 1
+
+    def _rotate(self):
+        """Shift path.N-1 -> path.N ... path -> path.1, dropping the oldest"""
+        if self.backup_count < 1:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self):
+        """Write everything queued so far and stop the writer thread"""
+        self.queue.put(None)
+        self.thread.join(timeout=2.0)
+
+
+def history_files(path, backup_count=None):
+    """Return the existing log files for path, oldest first"""
+    files = []
+    index = 1
+    while backup_count is None or index <= backup_count:
+        rotated = f"{path}.{index}"
+        if not os.path.exists(rotated):
+            break
+        files.append(rotated)
+        index += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def iter_sessions(path):
+    """Yield session records one at a time, oldest first, skipping bad lines"""
+    for name in history_files(path):
+        with open(name, 'rb') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A partly written last line after a crash
+                    continue
+
+
+def aggregate(records):
+    """Fold session records into totals in a single pass"""
+    totals = {
+        "sessions": 0,
+        "clicks": 0,
+        "duration_s": 0.0,
+        "achieved_cps": 0.0,
+        "worst_lateness_p99_ms": 0.0,
+        "first_start": None,
+        "last_end": None,
+        "stop_reasons": {}
+    }
+    for record in records:
+        totals["sessions"] += 1
+        totals["clicks"] += record["clicks"]
+        totals["duration_s"] += record["duration_s"]
+        totals["worst_lateness_p99_ms"] = max(
+            totals["worst_lateness_p99_ms"], record["lateness_p99_ms"]
+        )
+        if totals["first_start"] is None or record["start"] < totals["first_start"]:
+            totals["first_start"] = record["start"]
+        if totals["last_end"] is None or record["end"] > totals["last_end"]:
+            totals["last_end"] = record["end"]
+        reason = record["stop_reason"]
+        totals["stop_reasons"][reason] = totals["stop_reasons"].get(reason, 0) + 1
+    if totals["duration_s"] > 0:
+        totals["achieved_cps"] = totals["clicks"] / totals["duration_s"]
+    return totals
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Summarize the SpeedAutoClicker session history")
+    parser.add_argument("path", nargs="?", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "history.jsonl"))
+    args = parser.parse_args()
+
+    totals = aggregate(iter_sessions(args.path))
+    if not totals["sessions"]:
+        print(f"No sessions recorded in {args.path}")
+        return
+    print(f"Sessions: {totals['sessions']}")
+    print(f"From {time.ctime(totals['first_start'])} to {time.ctime(totals['last_end'])}")
+    print(f"Clicks: {totals['clicks']} in {totals['duration_s']:.1f} s "
+          f"({totals['achieved_cps']:.2f} CPS overall)")
+    print(f"Worst p99 lateness: {totals['worst_lateness_p99_ms']:.3f} ms")
+    for reason, count in sorted(totals["stop_reasons"].items()):
+        print(f"  {reason}: {count}")
+
+
+if __name__ == "__main__":
+    main()
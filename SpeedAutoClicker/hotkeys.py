@@ -0,0 +1,164 @@
+"""
+Precompiled hotkey matching
+
+Hotkey specs such as "f6" or "ctrl+shift+k" are compiled once into a table
+keyed on (key name, modifier bitmask), so the keyboard listener callback only
+does a couple of dict lookups per event. Normalized names for pynput key
+objects are cached, and the table is rebuilt only when the config changes.
+
+A key's char is already translated by the held modifiers on some platforms
+(on macOS alt+k gives "˚" and ctrl+k a control character), so keys are
+also named by virtual key code. Codes seen without modifiers learn their
+layout's name; a static table covers keys not pressed on their own yet.
+"""
+
+import sys
+
+# Modifier bits; left/right variants collapse onto one bit
+MODIFIER_BITS = {
+    "ctrl": 1, "ctrl_l": 1, "ctrl_r": 1,
+    "shift": 2, "shift_l": 2, "shift_r": 2,
+    "alt": 4, "alt_l": 4, "alt_r": 4, "alt_gr": 4,
+    "cmd": 8, "cmd_l": 8, "cmd_r": 8
+}
+
+# Canonical name for each modifier key
+MODIFIER_NAMES = {
+    "ctrl_l": "ctrl", "ctrl_r": "ctrl",
+    "shift_l": "shift", "shift_r": "shift",
+    "alt_l": "alt", "alt_r": "alt", "alt_gr": "alt",
+    "cmd_l": "cmd", "cmd_r": "cmd"
+}
+
+# Tk keysyms and common spellings mapped onto pynput key names
+ALIASES = {
+    "control": "ctrl", "control_l": "ctrl", "control_r": "ctrl",
+    "option": "alt", "option_l": "alt", "option_r": "alt",
+    "command": "cmd", "meta_l": "cmd", "meta_r": "cmd", "super": "cmd",
+    "escape": "esc", "return": "enter", "prior": "page_up", "next": "page_down",
+    "bracketleft": "[", "bracketright": "]",
+    "comma": ",", "period": ".", "slash": "/", "minus": "-", "equal": "=",
+    "semicolon": ";", "apostrophe": "'", "grave": "`", "backslash": "\\"
+}
+
+
+
+def _static_vk_names():
+    if sys.platform == "darwin":
+        # kVK_ANSI_* codes (US layout positions)
+        codes = {
+            "a": 0, "s": 1, "d": 2, "f": 3, "h": 4, "g": 5, "z": 6, "x": 7,
+            "c": 8, "v": 9, "b": 11, "q": 12, "w": 13, "e": 14, "r": 15,
+            "y": 16, "t": 17, "1": 18, "2": 19, "3": 20, "4": 21, "6": 22,
+            "5": 23, "=": 24, "9": 25, "7": 26, "-": 27, "8": 28, "0": 29,
+            "]": 30, "o": 31, "u": 32, "[": 33, "i": 34, "p": 35, "l": 37,
+            "j": 38, "'": 39, "k": 40, ";": 41, "\\": 42, ",": 43, "/": 44,
+            "n": 45, "m": 46, ".": 47, "`": 50
+        }
+        return {vk: name for name, vk in codes.items()}
+    if sys.platform == "win32":
+        # Virtual-key codes of letters and digits are their ASCII capitals
+        return {ord(c): c.lower() for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"}
+    return {}
+
+
+# Virtual key code -> key name, for keys whose char the modifiers changed
+VK_NAMES = _static_vk_names()
+
+
+def key_name(key):
+    """Return the normalized name of a pynput key object"""
+    char = getattr(key, "char", None)
+    if char:
+        return char.lower()
+    name = getattr(key, "name", None)
+    if name:
+        name = name.lower()
+        return MODIFIER_NAMES.get(name, name)
+    vk = getattr(key, "vk", None)
+    if vk is not None:
+        return f"<{vk}>"
+    return str(key).lower()
+
+
+def parse_spec(spec):
+    """Parse "ctrl+shift+k" into (trigger key name, modifier bitmask)"""
+    parts = [p.strip().lower() for p in spec.split("+") if p.strip()]
+    if not parts:
+        raise ValueError(f"Empty hotkey: {spec!r}")
+    parts = [ALIASES.get(p, MODIFIER_NAMES.get(p, p)) for p in parts]
+
+    trigger = parts[-1]
+    mask = 0
+    for part in parts[:-1]:
+        if part not in MODIFIER_BITS:
+            raise ValueError(f"Not a modifier key in hotkey {spec!r}: {part}")
+        mask |= MODIFIER_BITS[part]
+    return trigger, mask
+
+
+class HotkeyMatcher:
+    """Dispatch table from key chords to press/release callbacks"""
+
+    def __init__(self):
+        self.table = {}
+        self.names = {}
+        self.vk_names = dict(VK_NAMES)
+        self.modifiers = 0
+        self.active = {}
+
+    def compile(self, bindings):
+        """Build the lookup table from (spec, on_press, on_release) tuples
+
+        Invalid specs are reported and skipped. The new table replaces the
+        old one in a single assignment, so the listener never sees a
+        half-built table.
+        """
+        table = {}
+        for spec, on_press, on_release in bindings:
+            try:
+                table[parse_spec(spec)] = (on_press, on_release)
+            except ValueError as e:
+                print(f"Ignoring hotkey: {e}")
+        self.table = table
+
+    def _name(self, key, learn=False):
+        name = self.names.get(key)
+        if name is None:
+            name = key_name(key)
+            self.names[key] = name
+        vk = getattr(key, "vk", None)
+        if vk is None:
+            return name
+        if learn and not self.modifiers and getattr(key, "char", None) and name.isprintable():
+            # Unmodified key presses name the key in the current layout
+            self.vk_names[vk] = name
+            return name
+        return self.vk_names.get(vk, name)
+
+    def press(self, key):
+        """Return the press callback bound to this key event, if any"""
+        name = self._name(key, learn=True)
+        bit = MODIFIER_BITS.get(name, 0)
+
+        # Ignore auto-repeat while the trigger is held
+        if name in self.active:
+            return None
+
+        binding = self.table.get((name, self.modifiers & ~bit))
+        self.modifiers |= bit
+        if binding is None:
+            return None
+        self.active[name] = binding
+        return binding[0]
+
+    def release(self, key):
+        """Return the release callback of the binding this key started, if any"""
+        name = self._name(key)
+        bit = MODIFIER_BITS.get(name, 0)
+        if bit:
+            self.modifiers &= ~bit
+        binding = self.active.pop(name, None)
+        if binding is None:
+            return None
+        return binding[1]
@@ -0,0 +1,106 @@
+"""
+Randomized ("humanized") interval and duty-cycle jitter
+
+Jitter factors are generated in batches into preallocated buffers, with
+NumPy when it is installed and the random module otherwise. NumPy is only
+imported once jitter is actually enabled, keeping startup fast. The click loop
+only reads the next value from the current buffer; when a buffer runs out
+it swaps in the spare one and the loop refills the empty buffer after the
+click has been posted, so per-click randomness costs an index bump.
+"""
+
+import math
+import random
+from array import array
+
+DISTRIBUTIONS = ("none", "uniform", "gaussian", "lognormal")
+
+
+class JitterSource:
+    """Double-buffered stream of multiplicative jitter factors around 1.0
+
+    amount is the spread as a fraction (0.1 = 10%): the half-width for
+    uniform, and the standard deviation for gaussian and the log of the
+    log-normal. Factors are clamped to 1 +/- 3 * amount, and never below 0.05.
+    """
+
+    def __init__(self, distribution="none", amount=0.0, seed=None, batch_size=1024):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown jitter distribution: {distribution}")
+        self.distribution = distribution
+        self.amount = float(amount)
+        self.batch_size = batch_size
+        self.low = max(0.05, 1.0 - 3.0 * self.amount)
+        self.high = 1.0 + 3.0 * self.amount
+
+        self.np = None
+        if self.enabled:
+            try:
+                import numpy
+                self.np = numpy
+            except ImportError:
+                pass
+        if self.np is not None:
+            self.rng = self.np.random.default_rng(seed)
+        else:
+            self.rng = random.Random(seed)
+
+        self.buffer = array('d', bytes(8 * batch_size))
+        self.spare = array('d', bytes(8 * batch_size))
+        self._fill(self.buffer)
+        self._fill(self.spare)
+        self.index = 0
+        self.needs_refill = False
+
+    @property
+    def enabled(self):
+        return self.distribution != "none" and self.amount > 0
+
+    def _generate_numpy(self, n):
+        np, rng, a = self.np, self.rng, self.amount
+        if self.distribution == "uniform":
+            values = rng.uniform(1.0 - a, 1.0 + a, n)
+        elif self.distribution == "gaussian":
+            values = rng.normal(1.0, a, n)
+        else:
+            values = np.exp(rng.normal(0.0, a, n))
+        return np.clip(values, self.low, self.high).tolist()
+
+    def _generate_python(self, n):
+        rng, a = self.rng, self.amount
+        if self.distribution == "uniform":
+            values = [rng.uniform(1.0 - a, 1.0 + a) for _ in range(n)]
+        elif self.distribution == "gaussian":
+            values = [rng.gauss(1.0, a) for _ in range(n)]
+        else:
+            values = [math.exp(rng.gauss(0.0, a)) for _ in range(n)]
+        low, high = self.low, self.high
+        return [low if v < low else high if v > high else v for v in values]
+
+    def _fill(self, buffer):
+        n = self.batch_size
+        if not self.enabled:
+            buffer[:] = array('d', [1.0]) * n
+        elif self.np is not None:
+            buffer[:] = array('d', self._generate_numpy(n))
+        else:
+            buffer[:] = array('d', self._generate_python(n))
+
+    def next(self):
+        """Return the next jitter factor"""
+        if self.index >= self.batch_size:
+            # Swap in the spare batch; refill() regenerates the used one
+            if self.needs_refill:
+                self.refill()
+            self.buffer, self.spare = self.spare, self.buffer
+            self.index = 0
+            self.needs_refill = True
+        value = self.buffer[self.index]
+        self.index += 1
+        return value
+
+    def refill(self):
+        """Regenerate the spare batch if it was used up; call off the hot path"""
+        if self.needs_refill:
+            self._fill(self.spare)
+            self.needs_refill = False
@@ -0,0 +1,160 @@
+"""
+Click-sequence macros
+
+A macro is a list of steps, e.g.
+
+    [
+        {"move": [400, 300]},
+        {"click": "left", "hold_ms": 20},
+        {"delay": 100},
+        {"repeat": 10, "steps": [{"down": "right"}, {"delay": 5}, {"up": "right"}]}
+    ]
+
+Macros are compiled ahead of time into a flat timeline of (offset, action)
+entries stored column-wise in arrays, with repeat blocks unrolled. Playback
+then only walks the arrays, so long macros start instantly and no step is
+parsed or allocated while the clock is running.
+"""
+
+from array import array
+from backends import BUTTONS, ACTION_DOWN, ACTION_UP, ACTION_MOVE
+
+# Guard against accidentally huge unrolled repeat blocks
+MAX_TIMELINE_EVENTS = 5_000_000
+
+
+class MacroTimeline:
+    """Flat, precomputed playback timeline of a compiled macro"""
+
+    def __init__(self):
+        self.offsets = array('d')
+        self.actions = array('B')
+        self.buttons = array('B')
+        self.xs = array('d')
+        self.ys = array('d')
+        self.duration = 0.0
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _append(self, action, button=0, x=0.0, y=0.0):
+        if len(self.offsets) >= MAX_TIMELINE_EVENTS:
+            raise ValueError(f"Macro expands to more than {MAX_TIMELINE_EVENTS} events")
+        self.offsets.append(self.duration)
+        self.actions.append(action)
+        self.buttons.append(button)
+        self.xs.append(x)
+        self.ys.append(y)
+
+    @property
+    def click_count(self):
+        """Number of button releases in the timeline"""
+        return self.actions.count(ACTION_UP)
+
+
+def _button_index(name):
+    if name not in BUTTONS:
+        raise ValueError(f"Unknown mouse button in macro: {name}")
+    return BUTTONS.index(name)
+
+
+def _compile_steps(steps, timeline):
+    for step in steps:
+        if not isinstance(step, dict):
+            raise ValueError(f"Macro step must be an object, got {step!r}")
+        if "move" in step:
+            x, y = step["move"]
+            timeline._append(ACTION_MOVE, x=float(x), y=float(y))
+        elif "down" in step:
+            timeline._append(ACTION_DOWN, _button_index(step["down"]))
+        elif "up" in step:
+            timeline._append(ACTION_UP, _button_index(step["up"]))
+        elif "click" in step:
+            button = _button_index(step["click"])
+            timeline._append(ACTION_DOWN, button)
+            timeline.duration += float(step.get("hold_ms", 0.0)) / 1000.0
+            timeline._append(ACTION_UP, button)
+        elif "delay" in step:
+            delay = float(step["delay"])
+            if delay < 0:
+                raise ValueError(f"Macro delay must not be negative, got {delay}")
+            timeline.duration += delay / 1000.0
+        elif "repeat" in step:
+            count = int(step["repeat"])
+            if count < 0:
+                raise ValueError(f"Macro repeat count must not be negative, got {count}")
+            for _ in range(count):
+                _compile_steps(step.get("steps", []), timeline)
+        else:
+            raise ValueError(f"Unknown macro step: {step!r}")
+
+
+def compile_macro(steps):
+    """Compile a list of macro steps into a MacroTimeline
+
+    Raises ValueError for malformed steps.
+    """
+    timeline = MacroTimeline()
+    try:
+        _compile_steps(steps, timeline)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Invalid macro step: {e}")
+    return timeline
+
+
+def compile_macros(macros):
+    """Compile a {name: steps} dict, skipping and reporting invalid macros"""
+    compiled = {}
+    for name, steps in macros.items():
+        try:
+            compiled[name] = compile_macro(steps)
+        except ValueError as e:
+            print(f"Ignoring macro {name}: {e}")
+    return compiled
+
+
+def play_timeline(timeline, backend, waiter, start, speed=1.0, on_click=None):
+    """Play a timeline through backend, anchored at perf_counter time start
+
+    Returns True if the whole timeline was played, False if the waiter was
+    stopped. Buttons still held when playback stops are released. Down/up
+    events are prepared once per button and only moved when the position
+    changes, so playback builds no events per step.
+    """
+    offsets = timeline.offsets
+    actions = timeline.actions
+    buttons = timeline.buttons
+    xs, ys = timeline.xs, timeline.ys
+    wait_until = waiter.wait_until
+    scale = 1.0 / speed
+
+    position = backend.get_position()
+    prepared = [backend.prepare(button, position) for button in BUTTONS]
+    held = set()
+    completed = True
+    for i in range(len(offsets)):
+        if not wait_until(start + offsets[i] * scale):
+            completed = False
+            break
+        action = actions[i]
+        if action == ACTION_MOVE:
+            position = (xs[i], ys[i])
+            backend.move(position)
+            continue
+        click = prepared[buttons[i]]
+        if click.position != position:
+            backend.reposition(click, position)
+        if action == ACTION_DOWN:
+            backend.post_down(click)
+            held.add(click)
+        else:
+            backend.post_up(click)
+            held.discard(click)
+            if on_click:
+                on_click()
+
+    for click in held:
+        if click.position != position:
+            backend.reposition(click, position)
+        backend.post_up(click)
+    return completed
@@ -1,22 +1,115 @@
 import os
 import sys
-import tkinter as tk
+import time
+import argparse
+
+# Measured from here so --report-startup covers our own imports
+START_TIME = time.perf_counter()
+
 from auto_clicker import AutoClicker
-from gui import AutoClickerGUI
 
-def main():
-    # Get the directory of the script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Path to the config file
-    config_path = os.path.join(script_dir, "config.json")
-    
-    # Create the auto clicker instance
-    auto_clicker = AutoClicker(config_path)
-    
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="SpeedAutoClicker",
+        description="Advanced auto clicker. Starts the GUI unless --headless is given."
+    )
+    parser.add_argument("--headless", action="store_true",
+                        help="run the click engine without a window")
+    parser.add_argument("--config", help="path to config.json (default: next to this script)")
+    parser.add_argument("--backend", help="click backend: auto, quartz, pynput, xtest, recording or null")
+    parser.add_argument("--interval", type=float, help="click interval in ms")
+    parser.add_argument("--duty", type=float, help="duty cycle in percent")
+    parser.add_argument("--button", choices=["left", "right", "middle"], help="mouse button")
+    parser.add_argument("--clicks", type=int, help="stop after this many clicks")
+    parser.add_argument("--duration", type=float, help="stop and exit after this many seconds")
+    parser.add_argument("--start", action="store_true",
+                        help="start clicking immediately and exit when the session ends")
+    parser.add_argument("--engine-process", action="store_true",
+                        help="run the click engine in a separate process")
+    parser.add_argument("--no-hotkeys", action="store_true", help="do not listen for hotkeys")
+    parser.add_argument("--control-socket", metavar="PATH", nargs="?", const="",
+                        help="serve the control API on a Unix socket (default: ~/.speedautoclicker.sock)")
+    parser.add_argument("--report-startup", action="store_true",
+                        help="print the time from launch until the engine is ready")
+    return parser.parse_args(argv)
+
+
+def create_auto_clicker(args, config_path):
+    """Create the engine and apply command line overrides for this run only"""
+    from engine_process import process_mode_enabled
+
+    if args.engine_process or process_mode_enabled(config_path):
+        from engine_process import ProcessAutoClicker
+        # The child process creates the backend itself, so pass its name
+        auto_clicker = ProcessAutoClicker(
+            config_path, backend=args.backend, listen_hotkeys=not args.no_hotkeys
+        )
+    else:
+        backend = None
+        if args.backend:
+            from backends import create_backend
+            backend = create_backend(args.backend)
+        auto_clicker = AutoClicker(config_path, backend=backend, listen_hotkeys=not args.no_hotkeys)
+
+    overrides = [
+        ("click_interval_ms", args.interval),
+        ("duty_cycle_percent", args.duty),
+        ("mouse_button", args.button)
+    ]
+    if args.clicks is not None:
+        overrides += [("click_limit.enabled", True), ("click_limit.count", args.clicks)]
+    for key, value in overrides:
+        if value is not None:
+            auto_clicker.update_config(key, value, persist=False)
+
+    if args.control_socket is not None:
+        auto_clicker.start_control_server(args.control_socket or None)
+    return auto_clicker
+
+
+def run_headless(args, auto_clicker):
+    """Run the engine without a window until the session or duration ends"""
+    import threading
+
+    session_done = threading.Event()
+
+    def on_status(status):
+        if not status["running"]:
+            session_done.set()
+
+    if args.start:
+        auto_clicker.add_status_listener(on_status)
+        auto_clicker.start_clicking()
+    else:
+        print(f"Waiting for hotkey {auto_clicker.config['hotkey']!r} (Ctrl+C to quit)")
+
+    try:
+        if args.start:
+            session_done.wait(args.duration)
+        elif args.duration is not None:
+            time.sleep(args.duration)
+        else:
+            # Hotkeys drive the engine; just keep the process alive
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        status = auto_clicker.get_status()
+        auto_clicker.cleanup()
+        print(f"Clicks performed: {status['click_count']} ({status['achieved_cps']:.2f} CPS)")
+
+
+def run_gui(auto_clicker, script_dir):
+    """Run the Tk user interface; tkinter and the GUI are only imported here"""
+    import tkinter as tk
+    from tkinter import messagebox
+    from gui import AutoClickerGUI
+
     # Create the GUI
     root = tk.Tk()
-    
+
     # Set application icon (if available)
     try:
         icon_path = os.path.join(script_dir, "icon.png")
@@ -25,30 +118,28 @@ def main():
             root.iconphoto(True, icon)
     except Exception as e:
         print(f"Could not load icon: {e}")
-    
+
     # Apply a more native macOS look
     try:
         root.tk.call('tk::mac::useTkAqua', 1)
     except:
         pass  # Not on macOS or Tk version doesn't support this
-    
+
     # Create the GUI
     app = AutoClickerGUI(root, auto_clicker)
-    
+
     # Set up exception handling for the GUI
     def handle_exception(exc_type, exc_value, exc_traceback):
         import traceback
-        print("".join(traceback.format_exception(exc_type, exc_value, 
-exc_traceback)))
-        tk.messagebox.showerror(
+        print("".join(traceback.format_exception(exc_type, exc_value, exc_traceback)))
+        messagebox.showerror(
             "Error",
-            f"An unexpected error occurred:\n{exc_value}\n\nPlease report 
-this to the developer."
+            f"An unexpected error occurred:\n{exc_value}\n\nPlease report this to the developer."
         )
-    
+
     # Set the exception handler
     sys.excepthook = handle_exception
-    
+
     # Start the GUI main loop
     try:
         root.mainloop()
@@ -58,6 +149,27 @@ this to the developer."
         # Clean up resources
         auto_clicker.cleanup()
 
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Get the directory of the script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # Path to the config file
+    config_path = args.config or os.path.join(script_dir, "config.json")
+
+    # Create the auto clicker instance
+    auto_clicker = create_auto_clicker(args, config_path)
+
+    if args.report_startup:
+        print(f"Engine ready in {(time.perf_counter() - START_TIME) * 1000:.1f} ms")
+
+    if args.headless:
+        run_headless(args, auto_clicker)
+    else:
+        run_gui(auto_clicker, script_dir)
+
+
 if __name__ == "__main__":
     main()
-
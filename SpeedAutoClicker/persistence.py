@@ -0,0 +1,84 @@
+"""
+Config persistence
+
+Settings change on every keystroke and slider movement in the GUI, so
+writes are handed to a background thread that coalesces changes over a short
+window and replaces config.json atomically via a temp file and rename. A
+crash mid-write can therefore never leave a truncated config behind.
+"""
+
+import os
+import tempfile
+import threading
+
+
+def write_atomic(path, data):
+    """Write text to path by writing a temp file and renaming it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".config-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigWriter:
+    """Background writer that debounces config saves"""
+
+    def __init__(self, path, serialize, delay=0.25):
+        self.path = path
+        self.serialize = serialize
+        self.delay = delay
+
+        self.dirty = False
+        self.write_count = 0
+        self.write_lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.close_event = threading.Event()
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def schedule(self):
+        """Mark the config as changed; it is written after the debounce window"""
+        self.dirty = True
+        self.wake_event.set()
+
+    def _run(self):
+        while not self.close_event.is_set():
+            self.wake_event.wait()
+            # Coalesce changes arriving within the window; close cuts it short
+            self.close_event.wait(self.delay)
+            self.wake_event.clear()
+            self.flush()
+
+    def flush(self):
+        """Write pending changes now, from the calling thread"""
+        with self.write_lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            try:
+                write_atomic(self.path, self.serialize())
+                self.write_count += 1
+            except Exception as e:
+                # e.g. the config changed size while it was being serialized;
+                # keep the change pending and retry after the debounce window
+                print(f"Error saving config: {e}")
+                self.dirty = True
+                self.wake_event.set()
+
+    def close(self):
+        """Stop the writer thread and flush any pending changes"""
+        self.close_event.set()
+        self.wake_event.set()
+        self.thread.join(timeout=1.0)
+        self.flush()
@@ -0,0 +1,163 @@
+"""
+Precompiled click plans
+
+A ClickPlan holds every setting the click loop needs, already validated and
+converted to the units the loop works in. Plans are immutable: the config
+layer compiles a new one and swaps the AutoClicker's reference, and the
+running loop notices the new object at its next cycle boundary. Replacing a
+reference is atomic under the GIL, so the hot path needs no locks.
+"""
+
+from backends import BUTTONS
+from timing import ClickScheduler
+from jitter import DISTRIBUTIONS
+from targets import TARGET_MODES, compile_targets
+from trigger import compile_trigger
+
+
+class ClickPlan:
+    """Immutable, validated snapshot of the click settings"""
+
+    __slots__ = (
+        "button", "interval", "duty_cycle", "press_duration", "burst_size",
+        "slot_interval", "limit_enabled", "limit_count", "catch_up_policy",
+        "max_lateness", "interval_jitter", "duty_jitter", "jitter_seed", "jitter_batch_size",
+        "duration_limit", "rate_limit", "instrument", "targets", "target_weights",
+        "target_mode", "target_seed", "trigger"
+    )
+
+    def __init__(self, button, interval_ms, duty_cycle_percent, burst_size=1,
+                 limit_enabled=False, limit_count=0, catch_up_policy="skip",
+                 max_lateness_ms=20.0, interval_jitter=("none", 0.0),
+                 duty_jitter=("none", 0.0), jitter_seed=None, jitter_batch_size=1024,
+                 duration_limit_s=None,
+                 rate_limit=None, instrument=False, targets=None, target_weights=None,
+                 target_mode="round_robin", target_seed=None, trigger=None):
+        if button not in BUTTONS:
+            raise ValueError(f"Unknown mouse button: {button}")
+        if not interval_ms > 0:
+            raise ValueError(f"Click interval must be positive, got {interval_ms}")
+        if not 0 < duty_cycle_percent < 100:
+            raise ValueError(f"Duty cycle must be between 0 and 100, got {duty_cycle_percent}")
+        if int(burst_size) < 1:
+            raise ValueError(f"Burst size must be at least 1, got {burst_size}")
+        if limit_enabled and int(limit_count) < 1:
+            raise ValueError(f"Click limit must be at least 1, got {limit_count}")
+        if catch_up_policy not in ClickScheduler.POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {catch_up_policy}")
+        for distribution, amount in (interval_jitter, duty_jitter):
+            if distribution not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown jitter distribution: {distribution}")
+            if not 0 <= amount < 1:
+                raise ValueError(f"Jitter amount must be between 0 and 1, got {amount}")
+        if jitter_seed is not None and (type(jitter_seed) is not int or jitter_seed < 0):
+            raise ValueError(f"Jitter seed must be a non-negative integer, got {jitter_seed!r}")
+        if type(jitter_batch_size) is not int or jitter_batch_size < 1:
+            raise ValueError(f"Jitter batch size must be a positive integer, got {jitter_batch_size!r}")
+        if duration_limit_s is not None and not duration_limit_s > 0:
+            raise ValueError(f"Duration limit must be positive, got {duration_limit_s}")
+        if target_mode not in TARGET_MODES:
+            raise ValueError(f"Unknown target mode: {target_mode}")
+        if targets is not None and not targets:
+            raise ValueError("Target list must not be empty")
+        if rate_limit is not None:
+            if int(rate_limit[0]) < 1:
+                raise ValueError(f"Rate limit must allow at least 1 click, got {rate_limit[0]}")
+            if not rate_limit[1] > 0:
+                raise ValueError(f"Rate limit window must be positive, got {rate_limit[1]}")
+            if int(burst_size) > int(rate_limit[0]):
+                raise ValueError(f"Burst size {burst_size} exceeds the rate limit of {rate_limit[0]} clicks")
+
+        interval = float(interval_ms) / 1000.0
+        duty_cycle = float(duty_cycle_percent) / 100.0
+        burst_size = int(burst_size)
+
+        set_attr = object.__setattr__
+        set_attr(self, "button", button)
+        set_attr(self, "interval", interval)
+        set_attr(self, "duty_cycle", duty_cycle)
+        # Press duration; release fills the rest of the interval
+        set_attr(self, "press_duration", interval * duty_cycle)
+        set_attr(self, "burst_size", burst_size)
+        # In burst mode each scheduling slot carries several clicks, posted
+        # back-to-back, so the slot is burst_size intervals long
+        set_attr(self, "slot_interval", interval * burst_size)
+        set_attr(self, "limit_enabled", bool(limit_enabled))
+        set_attr(self, "limit_count", int(limit_count))
+        set_attr(self, "catch_up_policy", catch_up_policy)
+        set_attr(self, "max_lateness", float(max_lateness_ms) / 1000.0)
+        # (distribution, spread as a fraction) pairs
+        set_attr(self, "interval_jitter", (interval_jitter[0], float(interval_jitter[1])))
+        set_attr(self, "duty_jitter", (duty_jitter[0], float(duty_jitter[1])))
+        set_attr(self, "jitter_seed", jitter_seed)
+        set_attr(self, "jitter_batch_size", jitter_batch_size)
+        # Session length in seconds, or None for no time limit
+        set_attr(self, "duration_limit",
+                 None if duration_limit_s is None else float(duration_limit_s))
+        # (max clicks, window in seconds), or None for no rate cap
+        set_attr(self, "rate_limit",
+                 None if rate_limit is None else (int(rate_limit[0]), float(rate_limit[1]) / 1000.0))
+        # Whether the loop times each phase of a click
+        set_attr(self, "instrument", bool(instrument))
+        # Fixed click positions to cycle through, or None to follow the cursor
+        set_attr(self, "targets", None if targets is None else tuple(targets))
+        set_attr(self, "target_weights", None if target_weights is None else tuple(target_weights))
+        set_attr(self, "target_mode", target_mode)
+        set_attr(self, "target_seed", target_seed)
+        # Compiled pixel trigger settings (see trigger.compile_trigger), or None
+        set_attr(self, "trigger", trigger)
+
+    @classmethod
+    def from_config(cls, config):
+        """Compile a plan from a config dict, raising ValueError if invalid"""
+        try:
+            jitter = config["jitter"]
+            duration = config["duration_limit"]
+            rate = config["rate_limit"]
+            targets = config["targets"]
+            positions, weights = compile_targets(targets) if targets["enabled"] else (None, None)
+            trigger = config["trigger"]
+            return cls(
+                config["mouse_button"],
+                float(config["click_interval_ms"]),
+                float(config["duty_cycle_percent"]),
+                burst_size=config["burst_size"],
+                limit_enabled=config["click_limit"]["enabled"],
+                limit_count=config["click_limit"]["count"],
+                catch_up_policy=config["timing"]["catch_up_policy"],
+                max_lateness_ms=config["timing"]["max_lateness_ms"],
+                interval_jitter=(
+                    jitter["interval"]["distribution"],
+                    float(jitter["interval"]["amount_percent"]) / 100.0
+                ),
+                duty_jitter=(
+                    jitter["duty"]["distribution"],
+                    float(jitter["duty"]["amount_percent"]) / 100.0
+                ),
+                jitter_seed=jitter["seed"],
+                jitter_batch_size=jitter["batch_size"],
+                duration_limit_s=float(duration["seconds"]) if duration["enabled"] else None,
+                rate_limit=(
+                    (rate["max_clicks"], float(rate["window_ms"])) if rate["enabled"] else None
+                ),
+                instrument=config["profiling"]["phase_counters"],
+                targets=positions,
+                target_weights=weights,
+                target_mode=targets["mode"],
+                target_seed=targets["seed"],
+                trigger=compile_trigger(trigger) if trigger["enabled"] else None
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid click settings: {e}")
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ClickPlan is immutable")
+
+    def _key(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, ClickPlan) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
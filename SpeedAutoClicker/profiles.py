@@ -0,0 +1,85 @@
+"""
+Named click profiles
+
+A profile is a named set of click settings stored under "profiles" in the
+config, e.g. {"fast": {"click_interval_ms": 10, "mouse_button": "left"}}.
+Every profile is overlaid on the base settings, the values last set
+outside of profiles and saved under "profile_base", and compiled into a ClickPlan when the config loads or
+changes. Switching profiles is only a reference swap plus copying a few
+values into the config; it never validates or compiles anything, and since
+no profile depends on the one applied before it, the others stay valid.
+"""
+
+import copy
+from plan import ClickPlan
+
+# Settings a profile may override; all of them feed the click plan
+PROFILE_KEYS = (
+    "click_interval_ms", "duty_cycle_percent", "mouse_button", "burst_size",
+    "click_limit", "duration_limit", "rate_limit", "jitter", "targets", "trigger"
+)
+
+
+def profile_overlay(config, profile):
+    """Return the top-level config values that applying profile produces
+
+    Nested sections such as click_limit are merged, so a profile can set
+    just {"click_limit": {"count": 50}}.
+    """
+    overlay = {}
+    for key, value in profile.items():
+        if key not in PROFILE_KEYS:
+            raise ValueError(f"Profiles cannot set {key!r}")
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            merged = copy.deepcopy(config[key])
+            merged.update(value)
+            value = merged
+        overlay[key] = value
+    return overlay
+
+
+def base_settings(config):
+    """Return copies of the settings profiles are overlaid on
+
+    They come from the saved "profile_base" section, so a restart with a
+    profile applied still knows the values underneath it. Settings missing
+    there are taken from the top-level config.
+    """
+    saved = config.get("profile_base", {})
+    base = {}
+    for key in PROFILE_KEYS:
+        value = copy.deepcopy(config[key])
+        if key in saved:
+            if isinstance(value, dict) and isinstance(saved[key], dict):
+                value.update(copy.deepcopy(saved[key]))
+            else:
+                value = copy.deepcopy(saved[key])
+        base[key] = value
+    return base
+
+
+def apply_profile(config, base, overlay):
+    """Set config to the base settings with overlay on top
+
+    Values are copied, so config shares no nested dicts with either.
+    """
+    for key, value in base.items():
+        config[key] = copy.deepcopy(overlay.get(key, value))
+
+
+def compile_profiles(config, base):
+    """Compile every profile on top of base into (plan, overlay), skipping invalid ones"""
+    config = dict(config)
+    config.update(base)
+    compiled = {}
+    for name, profile in config["profiles"].items():
+        try:
+            if not isinstance(profile, dict):
+                raise ValueError("profile must be an object")
+            overlay = profile_overlay(config, profile)
+            settings = dict(config)
+            settings.update(overlay)
+            compiled[name] = (ClickPlan.from_config(settings), overlay)
+        except ValueError as e:
+            print(f"Ignoring profile {name}: {e}")
+    return compiled
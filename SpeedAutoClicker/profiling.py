@@ -0,0 +1,186 @@
+"""
+Opt-in instrumentation for the click loop
+
+PhaseCounters accumulates the time and call count of each phase of a click
+(cursor query, event preparation, posting, waiting). The click loop only
+pays for it while it is enabled: it then swaps its backend and waiter for
+the instrumented wrappers below, and swaps the plain objects back when
+instrumentation is switched off, so the default path is unchanged.
+
+run_profiled runs a whole session under cProfile or a simple sampling
+profiler and writes the results to a file.
+"""
+
+import os
+import sys
+import threading
+import time
+from array import array
+
+PHASES = ("position", "prepare", "reposition", "post", "wait")
+POSITION, PREPARE, REPOSITION, POST, WAIT = range(len(PHASES))
+
+PROFILERS = ("none", "cprofile", "sampling")
+
+
+class PhaseCounters:
+    """Accumulated duration and call count per click phase"""
+
+    def __init__(self):
+        self.totals = array('d', bytes(8 * len(PHASES)))
+        self.counts = array('Q', bytes(8 * len(PHASES)))
+
+    def reset(self):
+        for i in range(len(PHASES)):
+            self.totals[i] = 0.0
+            self.counts[i] = 0
+
+    def add(self, phase, duration):
+        self.totals[phase] += duration
+        self.counts[phase] += 1
+
+    def summary(self):
+        """Return {phase: {"count", "total_ms", "mean_us"}}"""
+        result = {}
+        for i, name in enumerate(PHASES):
+            count = self.counts[i]
+            total = self.totals[i]
+            result[name] = {
+                "count": count,
+                "total_ms": total * 1000.0,
+                "mean_us": total / count * 1e6 if count else 0.0
+            }
+        return result
+
+
+class InstrumentedBackend:
+    """Backend wrapper timing the calls the click loop makes"""
+
+    def __init__(self, backend, counters):
+        self.backend = backend
+        self.counters = counters
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def get_position(self):
+        start = time.perf_counter()
+        position = self.backend.get_position()
+        self.counters.add(POSITION, time.perf_counter() - start)
+        return position
+
+    def prepare(self, button, position):
+        start = time.perf_counter()
+        prepared = self.backend.prepare(button, position)
+        self.counters.add(PREPARE, time.perf_counter() - start)
+        return prepared
+
+    def reposition(self, prepared, position):
+        start = time.perf_counter()
+        self.backend.reposition(prepared, position)
+        self.counters.add(REPOSITION, time.perf_counter() - start)
+
+    def post_down(self, prepared):
+        start = time.perf_counter()
+        self.backend.post_down(prepared)
+        self.counters.add(POST, time.perf_counter() - start)
+
+    def post_up(self, prepared):
+        start = time.perf_counter()
+        self.backend.post_up(prepared)
+        self.counters.add(POST, time.perf_counter() - start)
+
+    def post_burst(self, prepared, count):
+        start = time.perf_counter()
+        self.backend.post_burst(prepared, count)
+        self.counters.add(POST, time.perf_counter() - start)
+
+
+class InstrumentedWaiter:
+    """PrecisionWaiter wrapper timing each wait"""
+
+    def __init__(self, waiter, counters):
+        self.waiter = waiter
+        self.counters = counters
+
+    def __getattr__(self, name):
+        return getattr(self.waiter, name)
+
+    def wait_until(self, deadline):
+        start = time.perf_counter()
+        result = self.waiter.wait_until(deadline)
+        self.counters.add(WAIT, time.perf_counter() - start)
+        return result
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval into folded stacks"""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.sample_count = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        current_frames = sys._current_frames
+        while not self.stop_event.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack = ";".join(reversed(names))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.sample_count += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(timeout=1.0)
+
+    def dump(self, path):
+        """Write "stack count" lines, the input format of flame graph tools"""
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+
+
+def run_profiled(profiler, target, args, output_dir, sample_interval_ms=1.0):
+    """Run target(*args) under the named profiler and dump the results
+
+    Returns the path of the written profile, or None if nothing was written.
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler: {profiler}")
+    if profiler == "none":
+        target(*args)
+        return None
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    if profiler == "cprofile":
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.runcall(target, *args)
+        finally:
+            path = os.path.join(output_dir, f"profile-{stamp}.prof")
+            profile.dump_stats(path)
+        return path
+
+    sampler = SamplingProfiler(threading.get_ident(), sample_interval_ms / 1000.0)
+    sampler.start()
+    try:
+        target(*args)
+    finally:
+        sampler.stop()
+        path = os.path.join(output_dir, f"profile-{stamp}.folded")
+        sampler.dump(path)
+    return path
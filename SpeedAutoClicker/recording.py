@@ -0,0 +1,201 @@
+"""
+Input record-and-replay
+
+InputRecorder streams real mouse and keyboard activity, captured with pynput
+listeners, to disk as fixed-width binary records. The replayer memory-maps
+the file and decodes one record at a time while playing, so hour-long
+recordings are never loaded into memory as Python objects and playback
+starts immediately.
+
+File layout: an 8-byte magic header followed by RECORD structs of
+(time offset in seconds, event type, button, key code, x, y).
+"""
+
+import mmap
+import struct
+import threading
+import time
+from backends import BUTTONS, ACTION_DOWN, ACTION_UP, ACTION_MOVE, BackendUnavailable
+
+MAGIC = b"SACREC1\0"
+RECORD = struct.Struct("<dBBHii")
+
+# Event types beyond the backend's mouse action codes
+EVENT_SCROLL = 4
+EVENT_KEY_DOWN = 5
+EVENT_KEY_UP = 6
+
+
+class InputRecorder:
+    """Records mouse and keyboard events to a binary file"""
+
+    def __init__(self, path, record_keys=True):
+        try:
+            from pynput import mouse, keyboard
+        except ImportError as e:
+            raise BackendUnavailable(f"pynput is not available: {e}")
+
+        self.path = path
+        self.file = open(path, 'wb', buffering=64 * 1024)
+        self.file.write(MAGIC)
+        self.lock = threading.Lock()
+        self.event_count = 0
+        self.start_time = time.perf_counter()
+
+        self.mouse_listener = mouse.Listener(
+            on_move=self._on_move,
+            on_click=self._on_click,
+            on_scroll=self._on_scroll
+        )
+        self.keyboard_listener = None
+        if record_keys:
+            self.keyboard_listener = keyboard.Listener(
+                on_press=lambda key: self._on_key(EVENT_KEY_DOWN, key),
+                on_release=lambda key: self._on_key(EVENT_KEY_UP, key)
+            )
+
+    def _write(self, event_type, button=0, key_code=0, x=0, y=0):
+        data = RECORD.pack(
+            time.perf_counter() - self.start_time, event_type, button, key_code, int(x), int(y)
+        )
+        with self.lock:
+            if self.file:
+                self.file.write(data)
+                self.event_count += 1
+
+    def _on_move(self, x, y):
+        self._write(ACTION_MOVE, x=x, y=y)
+
+    def _on_click(self, x, y, button, pressed):
+        if button.name not in BUTTONS:
+            return
+        event_type = ACTION_DOWN if pressed else ACTION_UP
+        self._write(event_type, BUTTONS.index(button.name), x=x, y=y)
+
+    def _on_scroll(self, x, y, dx, dy):
+        self._write(EVENT_SCROLL, x=dx, y=dy)
+
+    def _on_key(self, event_type, key):
+        # Special keys (Key enum) carry their virtual key code in .value
+        vk = getattr(key, "vk", None)
+        if vk is None:
+            vk = getattr(getattr(key, "value", None), "vk", None)
+        if vk is not None and 0 <= vk <= 0xFFFF:
+            self._write(event_type, key_code=vk)
+
+    def start(self):
+        """Start capturing events"""
+        self.start_time = time.perf_counter()
+        self.mouse_listener.start()
+        if self.keyboard_listener:
+            self.keyboard_listener.start()
+
+    def stop(self):
+        """Stop capturing and close the file"""
+        self.mouse_listener.stop()
+        if self.keyboard_listener:
+            self.keyboard_listener.stop()
+        with self.lock:
+            self.file.close()
+            self.file = None
+
+
+class Recording:
+    """Memory-mapped view of a recording file"""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"Empty recording: {path}")
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a SpeedAutoClicker recording: {path}")
+        self.event_count = (len(self.map) - len(MAGIC)) // RECORD.size
+
+    def __len__(self):
+        return self.event_count
+
+    def event(self, index):
+        """Decode one record: (offset, type, button, key_code, x, y)"""
+        return RECORD.unpack_from(self.map, len(MAGIC) + index * RECORD.size)
+
+    @property
+    def duration(self):
+        if not self.event_count:
+            return 0.0
+        return self.event(self.event_count - 1)[0]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def _keyboard_controller():
+    try:
+        from pynput.keyboard import Controller, KeyCode
+    except ImportError:
+        return None, None
+    return Controller(), KeyCode
+
+
+def replay(recording, backend, waiter, start, speed=1.0, replay_keys=False, on_click=None):
+    """Replay a Recording through backend, anchored at perf_counter time start
+
+    Records are decoded lazily from the memory map as playback reaches
+    them. Returns True if the whole recording was played, False if the
+    waiter was stopped. Buttons still held when playback stops are released.
+    Down/up events are prepared once per button and moved to each recorded
+    position, so no events are built during playback.
+    """
+    keyboard, key_code = _keyboard_controller() if replay_keys else (None, None)
+    unpack_from = RECORD.unpack_from
+    data = recording.map
+    record_size = RECORD.size
+    offset = len(MAGIC)
+    wait_until = waiter.wait_until
+    scale = 1.0 / speed
+
+    position = backend.get_position()
+    prepared = [backend.prepare(name, position) for name in BUTTONS]
+    held = set()
+    completed = True
+    for _ in range(recording.event_count):
+        t, event_type, button, code, x, y = unpack_from(data, offset)
+        offset += record_size
+        if not wait_until(start + t * scale):
+            completed = False
+            break
+
+        # Scroll events are recorded but the click backends cannot post them
+        if event_type == ACTION_MOVE:
+            position = (x, y)
+            backend.move(position)
+        elif event_type == ACTION_DOWN:
+            position = (x, y)
+            click = prepared[button]
+            if click.position != position:
+                backend.reposition(click, position)
+            backend.post_down(click)
+            held.add(click)
+        elif event_type == ACTION_UP:
+            position = (x, y)
+            click = prepared[button]
+            if click.position != position:
+                backend.reposition(click, position)
+            backend.post_up(click)
+            held.discard(click)
+            if on_click:
+                on_click()
+        elif keyboard and event_type == EVENT_KEY_DOWN:
+            keyboard.press(key_code.from_vk(code))
+        elif keyboard and event_type == EVENT_KEY_UP:
+            keyboard.release(key_code.from_vk(code))
+
+    for click in held:
+        if click.position != position:
+            backend.reposition(click, position)
+        backend.post_up(click)
+    return completed
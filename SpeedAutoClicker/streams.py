@@ -0,0 +1,288 @@
+"""
+Multiple concurrent click streams on one timing thread
+
+Each ClickStream has its own button, interval, duty cycle, limit and hotkey.
+Instead of one spinning thread per stream, a single StreamMultiplexer thread
+keeps every pending down/up event in a deadline priority queue and sleeps
+until the earliest one, so adding streams does not multiply CPU use or GIL
+contention. Streams follow the cursor like the main click loop, by
+position_mode: "track" reads a CursorTracker, "query" asks the backend
+before every click and "locked" keeps the position the stream started at.
+"""
+
+import heapq
+import threading
+import time
+from backends import BackendUnavailable, CursorTracker
+from plan import ClickPlan
+from timing import ClickScheduler, PrecisionWaiter
+
+# Heap entry phases
+PHASE_DOWN = 0
+PHASE_UP = 1
+
+
+class ClickStream:
+    """One independently scheduled click stream"""
+
+    def __init__(self, name, plan, hotkey=None):
+        self.name = name
+        self.plan = plan
+        self.hotkey = hotkey
+        self.scheduler = ClickScheduler(
+            plan.interval,
+            policy=plan.catch_up_policy,
+            max_lateness=plan.max_lateness
+        )
+
+        self.running = False
+        self.click_count = 0
+        self.started_at = None
+        self.stopped_at = None
+        self.prepared = None
+        self.position = None
+
+        # Bumped on every start so stale queue entries can be recognised
+        self.generation = 0
+
+    @classmethod
+    def from_config(cls, spec, timing):
+        """Compile a stream from its config entry, raising ValueError if invalid"""
+        try:
+            limit = spec.get("click_limit", {})
+            plan = ClickPlan(
+                spec.get("mouse_button", "left"),
+                float(spec["click_interval_ms"]),
+                float(spec.get("duty_cycle_percent", 50.0)),
+                limit_enabled=limit.get("enabled", False),
+                limit_count=limit.get("count", 0),
+                catch_up_policy=timing["catch_up_policy"],
+                max_lateness_ms=timing["max_lateness_ms"]
+            )
+            return cls(spec["name"], plan, spec.get("hotkey"))
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid stream settings: {e}")
+
+    def get_status(self):
+        """Get the counters of this stream"""
+        end = self.stopped_at if self.stopped_at is not None else time.perf_counter()
+        elapsed = end - self.started_at if self.started_at is not None else 0.0
+        return {
+            "running": self.running,
+            "click_count": self.click_count,
+            "button": self.plan.button,
+            "target_cps": 1.0 / self.plan.interval,
+            "achieved_cps": self.click_count / elapsed if elapsed > 0 else 0.0,
+            "skipped_slots": self.scheduler.skipped
+        }
+
+
+class StreamMultiplexer:
+    """Single timing thread driving all active click streams"""
+
+    def __init__(self, backend, spin_margin_ms=1.0, auto_tune=True, position_mode="track"):
+        self.backend = backend
+        self.streams = {}
+        self.position_mode = position_mode
+        # Started with the first stream in "track" mode
+        self.tracker = None
+
+        # Entries are (deadline, sequence, phase, stream, generation, prepared);
+        # up entries carry the events their down was posted with
+        self.queue = []
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+        # Set whenever the queue changes, to cut the current wait short
+        self.wake_event = threading.Event()
+        self.close_event = threading.Event()
+        self.waiter = PrecisionWaiter(
+            self.wake_event,
+            spin_margin_ms=spin_margin_ms,
+            auto_tune=auto_tune
+        )
+        self.thread = None
+
+    def set_streams(self, specs, timing):
+        """Replace the configured streams, keeping running ones running
+
+        Streams whose settings changed pick up the new plan at their next
+        click; streams that were removed from the config are stopped.
+        """
+        compiled = {}
+        for spec in specs:
+            try:
+                stream = ClickStream.from_config(spec, timing)
+            except ValueError as e:
+                print(f"Ignoring click stream: {e}")
+                continue
+            compiled[stream.name] = stream
+
+        with self.lock:
+            for name, old in self.streams.items():
+                new = compiled.get(name)
+                if new is None:
+                    if old.running:
+                        old.running = False
+                        old.stopped_at = time.perf_counter()
+                    continue
+                old.hotkey = new.hotkey
+                if new.plan != old.plan:
+                    if new.plan.interval != old.plan.interval:
+                        old.scheduler.retime(new.plan.interval)
+                    old.scheduler.policy = new.plan.catch_up_policy
+                    old.scheduler.max_lateness = new.plan.max_lateness
+                    if new.plan.button != old.plan.button and old.prepared is not None:
+                        old.prepared = self.backend.prepare(new.plan.button, old.position)
+                    old.plan = new.plan
+                compiled[name] = old
+            self.streams = compiled
+
+    def _push(self, deadline, phase, stream, prepared=None):
+        self.sequence += 1
+        heapq.heappush(
+            self.queue,
+            (deadline, self.sequence, phase, stream, stream.generation, prepared)
+        )
+
+    def start_stream(self, name):
+        """Start a stream by name; returns False if unknown or already running"""
+        with self.lock:
+            stream = self.streams.get(name)
+            if stream is None or stream.running:
+                return False
+            now = time.perf_counter()
+            stream.generation += 1
+            stream.running = True
+            stream.click_count = 0
+            stream.started_at = now
+            stream.stopped_at = None
+            stream.position = self.backend.get_position()
+            stream.prepared = self.backend.prepare(stream.plan.button, stream.position)
+            if self.position_mode == "track" and self.tracker is None:
+                self._start_tracker(stream.position)
+            stream.scheduler.start(now)
+            self._push(now, PHASE_DOWN, stream)
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        self.wake_event.set()
+        return True
+
+    def _start_tracker(self, position):
+        try:
+            tracker = CursorTracker(position)
+            tracker.start()
+        except BackendUnavailable:
+            self.position_mode = "query"
+            return
+        self.tracker = tracker
+
+    def stop_stream(self, name):
+        """Stop a stream by name; a pending button release is still posted"""
+        with self.lock:
+            stream = self.streams.get(name)
+            if stream is None or not stream.running:
+                return False
+            stream.running = False
+            stream.stopped_at = time.perf_counter()
+        self.wake_event.set()
+        return True
+
+    def toggle_stream(self, name):
+        """Toggle a stream on/off"""
+        stream = self.streams.get(name)
+        if stream is not None and stream.running:
+            return self.stop_stream(name)
+        return self.start_stream(name)
+
+    def stop_all(self):
+        """Stop every running stream"""
+        for name in list(self.streams):
+            self.stop_stream(name)
+
+    def _run(self):
+        """Scheduler thread: wait for the earliest deadline and post its event"""
+        backend = self.backend
+        queue = self.queue
+        perf_counter = time.perf_counter
+
+        while not self.close_event.is_set():
+            with self.lock:
+                deadline = queue[0][0] if queue else None
+
+            if deadline is None:
+                self.wake_event.wait()
+                self.wake_event.clear()
+                continue
+
+            if not self.waiter.wait_until(deadline):
+                # Queue changed; re-evaluate the earliest deadline
+                self.wake_event.clear()
+                continue
+
+            with self.lock:
+                if not queue or queue[0][0] > deadline:
+                    continue
+                _, _, phase, stream, generation, prepared = heapq.heappop(queue)
+
+                if phase == PHASE_DOWN:
+                    if not stream.running or generation != stream.generation:
+                        continue
+                    mode = self.position_mode
+                    if mode != "locked":
+                        if mode == "track" and self.tracker is not None:
+                            position = self.tracker.position
+                        else:
+                            position = backend.get_position()
+                        if position != stream.position:
+                            backend.reposition(stream.prepared, position)
+                            stream.position = position
+                    prepared = stream.prepared
+                    backend.post_down(prepared)
+                    now = perf_counter()
+                    self._push(
+                        max(deadline, now) + stream.plan.press_duration,
+                        PHASE_UP, stream, prepared
+                    )
+                    continue
+
+                # Always release, even if the stream was stopped meanwhile
+                backend.post_up(prepared)
+                if generation != stream.generation:
+                    continue
+                stream.click_count += 1
+
+                plan = stream.plan
+                if plan.limit_enabled and stream.click_count >= plan.limit_count:
+                    stream.running = False
+                    stream.stopped_at = perf_counter()
+                if not stream.running:
+                    continue
+
+                scheduler = stream.scheduler
+                scheduler.advance()
+                self._push(scheduler.next_deadline(perf_counter()), PHASE_DOWN, stream)
+
+        # Release any buttons still held down
+        with self.lock:
+            for entry in queue:
+                if entry[2] == PHASE_UP:
+                    backend.post_up(entry[5])
+            queue.clear()
+
+    def get_status(self):
+        """Get per-stream counters"""
+        return {name: stream.get_status() for name, stream in self.streams.items()}
+
+    def close(self):
+        """Stop all streams and the scheduler thread"""
+        self.stop_all()
+        self.close_event.set()
+        self.wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        if self.tracker:
+            self.tracker.stop()
+            self.tracker = None
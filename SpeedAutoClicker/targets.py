@@ -0,0 +1,108 @@
+"""
+Multi-target click cycling
+
+Instead of clicking wherever the cursor is, the click loop can cycle through
+a list or grid of screen positions. Down/up events for every target are
+prepared once when the session (or a new plan) starts, so picking the next
+target is only an index lookup. TargetCycle produces target indices in
+round-robin, uniformly random or weighted random order. Random orders are
+generated in batches, double-buffered like the jitter factors, so the loop
+never calls into the random module per click.
+"""
+
+import random
+from array import array
+
+TARGET_MODES = ("round_robin", "random", "weighted")
+
+
+def compile_targets(spec):
+    """Expand a targets config section into (positions, weights)
+
+    Points are [x, y] or [x, y, weight]; a grid with columns and rows > 0
+    adds columns x rows points starting at origin, spacing apart. Raises
+    ValueError for malformed sections.
+    """
+    positions = []
+    weights = []
+    for point in spec["points"]:
+        if len(point) not in (2, 3):
+            raise ValueError(f"Target points must be [x, y] or [x, y, weight], got {point}")
+        positions.append((int(point[0]), int(point[1])))
+        weights.append(float(point[2]) if len(point) == 3 else 1.0)
+
+    grid = spec["grid"]
+    columns, rows = int(grid["columns"]), int(grid["rows"])
+    if columns > 0 and rows > 0:
+        x0, y0 = grid["origin"]
+        dx, dy = grid["spacing"]
+        for row in range(rows):
+            for column in range(columns):
+                positions.append((int(x0 + column * dx), int(y0 + row * dy)))
+                weights.append(1.0)
+
+    if not positions:
+        raise ValueError("Target mode needs at least one point or a grid")
+    if spec["mode"] not in TARGET_MODES:
+        raise ValueError(f"Unknown target mode: {spec['mode']}")
+    if any(w < 0 for w in weights) or not sum(weights) > 0:
+        raise ValueError("Target weights must be non-negative and not all zero")
+    return tuple(positions), tuple(weights)
+
+
+class TargetCycle:
+    """Endless sequence of target indices in the configured order"""
+
+    def __init__(self, count, mode="round_robin", weights=None, seed=None, batch_size=1024):
+        if mode not in TARGET_MODES:
+            raise ValueError(f"Unknown target mode: {mode}")
+        self.count = count
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self.population = range(count)
+        self.cum_weights = None
+        if mode == "weighted" and weights is not None:
+            total = 0.0
+            self.cum_weights = []
+            for weight in weights:
+                total += weight
+                self.cum_weights.append(total)
+
+        # Round robin repeats one fixed batch and never needs refilling
+        if mode == "round_robin":
+            batch_size = count
+        self.batch_size = batch_size
+        self.buffer = array('I', bytes(4 * batch_size))
+        self.spare = array('I', bytes(4 * batch_size))
+        self._fill(self.buffer)
+        self._fill(self.spare)
+        self.index = 0
+        self.needs_refill = False
+
+    def _fill(self, buffer):
+        if self.mode == "round_robin":
+            buffer[:] = array('I', self.population)
+        else:
+            buffer[:] = array('I', self.rng.choices(
+                self.population, cum_weights=self.cum_weights, k=self.batch_size
+            ))
+
+    def next(self):
+        """Return the next target index"""
+        if self.index >= self.batch_size:
+            if self.mode != "round_robin":
+                # Swap in the spare batch; refill() regenerates the used one
+                if self.needs_refill:
+                    self.refill()
+                self.buffer, self.spare = self.spare, self.buffer
+                self.needs_refill = True
+            self.index = 0
+        value = self.buffer[self.index]
+        self.index += 1
+        return value
+
+    def refill(self):
+        """Regenerate the spare batch if it was used up; call off the hot path"""
+        if self.needs_refill:
+            self._fill(self.spare)
+            self.needs_refill = False
@@ -0,0 +1,139 @@
+"""
+Per-click timing telemetry
+
+The click loop records scheduled and actual down/up timestamps for every
+click into a fixed-size ring buffer backed by preallocated arrays, so
+recording never allocates Python objects. Summaries are computed on demand
+over a sliding window of the most recent clicks.
+"""
+
+from array import array
+from bisect import bisect_left
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at fraction (0-1) of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = int(round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class ClickTelemetry:
+    """Ring buffer of (scheduled, down, up) timestamps for recent clicks"""
+
+    def __init__(self, capacity=4096, window=1000):
+        self.capacity = capacity
+        self.window = min(window, capacity)
+        self.scheduled = array('d', bytes(8 * capacity))
+        self.down = array('d', bytes(8 * capacity))
+        self.up = array('d', bytes(8 * capacity))
+        self.reset(0.0, None)
+
+    def reset(self, interval, duty_cycle, clicks_per_sample=1):
+        """Start a new session with the given interval (s) and duty cycle (0-1)
+
+        In burst mode one sample covers a whole burst; pass the burst size as
+        clicks_per_sample and None as duty_cycle, since bursts have no hold.
+        """
+        self.interval = interval
+        self.duty_cycle = duty_cycle
+        self.clicks_per_sample = clicks_per_sample
+        self.count = 0
+
+    def record(self, scheduled, down, up):
+        """Store one click's timestamps, overwriting the oldest entry"""
+        index = self.count % self.capacity
+        self.scheduled[index] = scheduled
+        self.down[index] = down
+        self.up[index] = up
+        self.count += 1
+
+    def _window_indices(self):
+        n = min(self.count, self.window)
+        start = self.count - n
+        capacity = self.capacity
+        return [(start + i) % capacity for i in range(n)]
+
+    def summary(self):
+        """Return timing statistics over the sliding window"""
+        indices = self._window_indices()
+        if not indices:
+            return {
+                "samples": 0,
+                "achieved_cps": 0.0,
+                "lateness_mean_ms": 0.0,
+                "lateness_p50_ms": 0.0,
+                "lateness_p99_ms": 0.0,
+                "lateness_max_ms": 0.0,
+                "duty_cycle_error_percent": None
+            }
+
+        scheduled, down, up = self.scheduled, self.down, self.up
+        lateness = sorted((down[i] - scheduled[i]) * 1000.0 for i in indices)
+
+        span = down[indices[-1]] - down[indices[0]]
+        achieved_cps = (len(indices) - 1) * self.clicks_per_sample / span if span > 0 else 0.0
+
+        # Duty cycle error in percentage points of the interval
+        duty_error = None
+        if self.duty_cycle is not None and self.interval > 0:
+            held = sum(up[i] - down[i] for i in indices) / len(indices)
+            duty_error = (held / self.interval - self.duty_cycle) * 100.0
+
+        return {
+            "samples": len(indices),
+            "achieved_cps": achieved_cps,
+            "lateness_mean_ms": sum(lateness) / len(lateness),
+            "lateness_p50_ms": percentile(lateness, 0.50),
+            "lateness_p99_ms": percentile(lateness, 0.99),
+            "lateness_max_ms": lateness[-1],
+            "duty_cycle_error_percent": duty_error
+        }
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of latencies, recorded without allocating"""
+
+    # Upper bucket bounds in ms; the last bucket counts everything above
+    BOUNDS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0)
+
+    def __init__(self):
+        self.counts = array('L', bytes(array('L').itemsize * (len(self.BOUNDS_MS) + 1)))
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds):
+        """Add one latency sample given in seconds"""
+        ms = seconds * 1000.0
+        self.counts[bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding fraction (0-1) of samples"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, n in zip(self.BOUNDS_MS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        """Return the sample count, mean, bucketed percentiles and bucket counts"""
+        buckets = {f"<={bound:g}ms": n for bound, n in zip(self.BOUNDS_MS, self.counts)}
+        buckets[f">{self.BOUNDS_MS[-1]:g}ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+            "buckets": buckets
+        }
@@ -0,0 +1,261 @@
+"""
+High-precision timing helpers for the click loop
+
+Pure busy-waiting gives the best accuracy but pins a CPU core and holds the
+GIL against the keyboard listener and Tk. PrecisionWaiter sleeps on the stop
+event until a small margin before the deadline and only spins for the last
+stretch, adapting that margin to how late the OS actually wakes us.
+"""
+
+import time
+from array import array
+
+
+class PrecisionWaiter:
+    """Sleep-then-spin waiter with an auto-tuned spin margin"""
+
+    def __init__(self, stop_event, spin_margin_ms=1.0, auto_tune=True,
+                 min_margin_ms=0.05, max_margin_ms=4.0):
+        self.stop_event = stop_event
+        self.margin = spin_margin_ms / 1000.0
+        self.auto_tune = auto_tune
+        self.min_margin = min_margin_ms / 1000.0
+        self.max_margin = max_margin_ms / 1000.0
+
+        # Running mean and mean deviation of observed oversleep
+        self.oversleep_mean = 0.0
+        self.oversleep_dev = 0.0
+
+        # Counters for checking how much time was spent spinning
+        self.sleep_count = 0
+        self.spin_time = 0.0
+
+    def wait_until(self, deadline):
+        """Wait until deadline (perf_counter seconds); return False if stopped"""
+        perf_counter = time.perf_counter
+        stop_event = self.stop_event
+
+        sleep_target = deadline - self.margin
+        sleep_for = sleep_target - perf_counter()
+        if sleep_for > 0:
+            if stop_event.wait(sleep_for):
+                return False
+            self.sleep_count += 1
+            if self.auto_tune:
+                self._tune(perf_counter() - sleep_target)
+
+        # Spin for the remaining stretch
+        spin_start = perf_counter()
+        now = spin_start
+        while now < deadline:
+            if stop_event.is_set():
+                self.spin_time += now - spin_start
+                return False
+            now = perf_counter()
+        self.spin_time += now - spin_start
+        return True
+
+    def _tune(self, oversleep):
+        """Adapt the spin margin to the observed wake-up lateness"""
+        self.oversleep_mean += (oversleep - self.oversleep_mean) * 0.05
+        self.oversleep_dev += (abs(oversleep - self.oversleep_mean) - self.oversleep_dev) * 0.05
+
+        # Cover all but the rarest late wake-ups
+        margin = self.oversleep_mean + 4.0 * self.oversleep_dev
+        if margin < self.min_margin:
+            margin = self.min_margin
+        elif margin > self.max_margin:
+            margin = self.max_margin
+        self.margin = margin
+
+    @property
+    def margin_ms(self):
+        return self.margin * 1000.0
+
+
+class ClickScheduler:
+    """Drift-free scheduler placing slot n at t0 + n * interval
+
+    Deadlines are computed from the session anchor rather than from the end
+    of the previous cycle, so per-click overhead never accumulates. When a
+    slot is more than max_lateness behind, the catch-up policy decides what
+    happens to the backlog:
+
+    - "burst": fire missed slots back-to-back, keeping at most max_lateness
+      worth of backlog
+    - "skip": drop missed slots and resume on the original grid
+    - "reanchor": restart the grid at the current time
+
+    Two optional session limits are enforced here too. A duration limit ends
+    the session once the next slot would start after the end time. A rate
+    cap allows at most max_clicks clicks in any window: the times of the
+    last max_clicks clicks are kept in a ring, and a slot is pushed back,
+    together with the rest of the grid, until the click that would be the
+    max_clicks-th inside the window has aged out of it. Clicks are logged
+    at the time their slot's last event was posted, which the caller passes
+    to advance(), so a late click can never squeeze an extra one into a
+    window. Both limits use the caller's clock readings only, so they add
+    no clock reads or other syscalls per click.
+    """
+
+    POLICIES = ("burst", "skip", "reanchor")
+
+    def __init__(self, interval, policy="skip", max_lateness=0.02):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {policy}")
+        self.interval = interval
+        self.policy = policy
+        self.max_lateness = max_lateness
+        self.t0 = 0.0
+        self.offset = 0.0
+        self.slot = 0
+        self.skipped = 0
+        self.reanchors = 0
+        self.started = 0.0
+        self.end_time = None
+        # Rate cap state; max_clicks is None when there is no rate cap
+        self.max_clicks = None
+        self.window = 0.0
+        self.cost = 1
+        self.click_times = array('d')
+        self.click_index = 0
+        self.recorded = 0
+        self.pending_time = 0.0
+        self.throttled = 0
+
+    def start(self, now=None):
+        """Anchor slot 0 at now"""
+        self.t0 = time.perf_counter() if now is None else now
+        self.slot = 0
+        self.offset = 0.0
+        self.started = self.t0
+        self.click_index = 0
+        self.recorded = 0
+
+    def set_limits(self, duration=None, max_clicks=None, window=None, cost=1):
+        """Set the session duration (s) and a rate cap of max_clicks per window (s)
+
+        The duration counts from start(), so changing it mid-session keeps
+        the time already spent, and so does the click history of the rate
+        cap. cost is the number of clicks per slot and must not exceed
+        max_clicks.
+        """
+        self.end_time = None if duration is None else self.started + duration
+        self.cost = cost
+        if max_clicks is None:
+            self.max_clicks = None
+            self.recorded = 0
+            return
+        if max_clicks < cost:
+            raise ValueError(f"A slot of {cost} clicks cannot fit a cap of {max_clicks}")
+        self.window = window
+        if max_clicks != self.max_clicks:
+            # Keep the most recent clicks, oldest first, in the new ring
+            kept = min(self.recorded, max_clicks)
+            ring = array('d', bytes(8 * max_clicks))
+            for i in range(kept):
+                ring[i] = self.click_times[(self.click_index - kept + i) % self.max_clicks]
+            self.click_times = ring
+            self.click_index = kept % max_clicks
+            self.recorded = kept
+            self.max_clicks = max_clicks
+
+    def next_deadline(self, now):
+        """Return the start time of the current slot after applying the policy
+
+        Returns None once the session duration is used up.
+        """
+        deadline = self._grid_deadline(now)
+        if self.max_clicks is not None:
+            deadline = self._throttle(deadline)
+        if self.end_time is not None and deadline >= self.end_time:
+            return None
+        return deadline
+
+    def _throttle(self, deadline):
+        """Delay deadline until the slot's clicks fit in the rolling window"""
+        # At most max_clicks - cost earlier clicks may lie inside the window
+        allowed = self.max_clicks - self.cost
+        if self.recorded > allowed:
+            blocking = self.click_times[(self.click_index - allowed - 1) % self.max_clicks]
+            earliest = blocking + self.window
+            if deadline < earliest:
+                self.offset += earliest - deadline
+                deadline = earliest
+                self.throttled += 1
+        self.pending_time = deadline
+        return deadline
+
+    def _grid_deadline(self, now):
+        base = self.t0 + self.offset
+        deadline = base + self.slot * self.interval
+        lateness = now - deadline
+        if lateness <= self.max_lateness:
+            return deadline
+
+        if self.policy == "reanchor":
+            self.t0 = now
+            self.offset = 0.0
+            self.slot = 0
+            self.reanchors += 1
+            return now
+
+        if self.policy == "skip":
+            # First grid slot that is not in the past
+            target = int((now - base) / self.interval)
+            if base + target * self.interval < now:
+                target += 1
+        else:
+            # Oldest slot still within the allowed backlog
+            target = int((now - self.max_lateness - base) / self.interval) + 1
+
+        if target > self.slot:
+            self.skipped += target - self.slot
+            self.slot = target
+        return base + self.slot * self.interval
+
+    def advance(self, jitter=0.0, posted=None):
+        """Move on to the next slot, optionally shifted by jitter seconds
+
+        Jitter accumulates into the grid offset, so a jittered slot moves
+        every later deadline with it instead of being pulled back. posted is
+        when the slot's last event went out (default: its deadline); the
+        rate cap counts the slot's clicks at that time.
+        """
+        self.slot += 1
+        self.offset += jitter
+        if self.max_clicks is not None:
+            at = self.pending_time if posted is None else max(posted, self.pending_time)
+            times = self.click_times
+            size = self.max_clicks
+            index = self.click_index
+            for _ in range(self.cost):
+                times[index] = at
+                index += 1
+                if index == size:
+                    index = 0
+            self.click_index = index
+            self.recorded = min(self.recorded + self.cost, size)
+
+    def resume(self, now):
+        """Restart the grid at now after a pause, keeping the session limits
+
+        Unlike start(), the duration limit still counts from the original
+        start and the rate cap keeps its click history.
+        """
+        self.t0 = now
+        self.offset = 0.0
+        self.slot = 0
+
+    def retime(self, interval):
+        """Switch to a new interval, keeping the phase of the last slot
+
+        The next deadline becomes the previous slot's start plus the new
+        interval, so a rate change takes effect on the very next click.
+        """
+        self.t0 += self.offset
+        self.offset = 0.0
+        if self.slot > 0:
+            self.t0 += (self.slot - 1) * self.interval
+            self.slot = 1
+        self.interval = interval
@@ -0,0 +1,331 @@
+"""
+Pixel/color-triggered clicking
+
+A PixelTrigger watches one screen region on its own thread and keeps an
+event set while the region matches a color condition. The click loop only
+clicks while the event is set, and when the trigger fires it wakes up and
+clicks straight away.
+
+Frames come from a FrameSource. QuartzFrameSource and PillowFrameSource
+capture only the watched region (Quartz directly through
+CGWindowListCreateImage; Pillow through ImageGrab, imported lazily), and
+SyntheticFrameSource serves frames set by the caller, for tests and
+benchmarks. Checks look at every downsample-th pixel of every downsample-th
+row and use NumPy when it is installed. NumPy is imported by the trigger
+thread before its first check, never at startup or on the way to a click. A
+frame identical to the previous one is not checked again.
+"""
+
+import threading
+import time
+from backends import BackendUnavailable
+
+
+class Frame:
+    """Captured pixels of the watched region
+
+    stride is the length of a row in bytes, pixel_size the bytes per pixel
+    and offsets the (red, green, blue) byte offsets inside a pixel. step is
+    the sampling step still to apply; sources that downsample while
+    capturing set it to 1.
+    """
+
+    __slots__ = ("data", "width", "height", "stride", "pixel_size", "offsets", "step")
+
+    def __init__(self, data, width, height, stride, pixel_size=3, offsets=(0, 1, 2), step=1):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.pixel_size = pixel_size
+        self.offsets = offsets
+        self.step = step
+
+
+class FrameSource:
+    """Base class for frame sources"""
+
+    name = "base"
+
+    def grab(self, region):
+        """Capture region (x, y, width, height) and return a Frame"""
+        raise NotImplementedError
+
+
+class QuartzFrameSource(FrameSource):
+    """macOS capture of just the watched region through Quartz"""
+
+    name = "quartz"
+
+    def __init__(self, downsample=1):
+        try:
+            import Quartz
+        except ImportError as e:
+            raise BackendUnavailable(f"Quartz is not available: {e}")
+        self.Quartz = Quartz
+        self.downsample = downsample
+
+    def grab(self, region):
+        Quartz = self.Quartz
+        x, y, width, height = region
+        image = Quartz.CGWindowListCreateImage(
+            Quartz.CGRectMake(x, y, width, height),
+            Quartz.kCGWindowListOptionOnScreenOnly,
+            Quartz.kCGNullWindowID,
+            Quartz.kCGWindowImageDefault
+        )
+        if image is None:
+            raise BackendUnavailable("Screen capture failed; check the screen recording permission")
+        data = bytes(Quartz.CGDataProviderCopyData(Quartz.CGImageGetDataProvider(image)))
+        # Quartz images are 32-bit BGRA; Retina screens give 2x the points
+        return Frame(
+            data,
+            Quartz.CGImageGetWidth(image),
+            Quartz.CGImageGetHeight(image),
+            Quartz.CGImageGetBytesPerRow(image),
+            pixel_size=4,
+            offsets=(2, 1, 0),
+            step=self.downsample
+        )
+
+
+class PillowFrameSource(FrameSource):
+    """Portable capture through Pillow's ImageGrab"""
+
+    name = "pillow"
+
+    def __init__(self, downsample=1):
+        try:
+            from PIL import ImageGrab
+        except ImportError as e:
+            raise BackendUnavailable(f"Pillow is not available: {e}")
+        self.ImageGrab = ImageGrab
+        self.downsample = downsample
+
+    def grab(self, region):
+        x, y, width, height = region
+        image = self.ImageGrab.grab(bbox=(x, y, x + width, y + height))
+        if self.downsample > 1:
+            # Box-filter in C instead of striding in Python
+            image = image.reduce(self.downsample)
+        image = image.convert("RGB")
+        return Frame(image.tobytes(), image.width, image.height, image.width * 3)
+
+
+class SyntheticFrameSource(FrameSource):
+    """Serves frames set by the caller instead of capturing the screen"""
+
+    name = "synthetic"
+
+    def __init__(self, width=16, height=16, color=(0, 0, 0), downsample=1):
+        self.width = width
+        self.height = height
+        self.downsample = downsample
+        self.grab_count = 0
+        self.set_color(color)
+
+    def set_color(self, color):
+        """Show a solid color frame"""
+        self.set_frame(bytes(color) * (self.width * self.height))
+
+    def set_frame(self, data):
+        """Show a frame of packed RGB rows"""
+        self.frame = Frame(
+            bytes(data), self.width, self.height, self.width * 3, step=self.downsample
+        )
+
+    def grab(self, region):
+        self.grab_count += 1
+        return self.frame
+
+
+FRAME_SOURCES = {
+    "quartz": QuartzFrameSource,
+    "pillow": PillowFrameSource
+}
+
+
+def create_frame_source(name="auto", downsample=1):
+    """Create a screen frame source by name; "auto" tries Quartz, then Pillow"""
+    names = ["quartz", "pillow"] if name == "auto" else [name]
+    errors = []
+    for candidate in names:
+        if candidate not in FRAME_SOURCES:
+            raise ValueError(f"Unknown frame source: {candidate}")
+        try:
+            return FRAME_SOURCES[candidate](downsample)
+        except BackendUnavailable as e:
+            errors.append(str(e))
+    raise BackendUnavailable("; ".join(errors))
+
+
+def compile_trigger(spec):
+    """Validate a trigger config section into a tuple for the click plan
+
+    Returns (region, color, tolerance, min_fraction, invert, downsample,
+    poll_interval_ms, source); raises ValueError for malformed sections.
+    """
+    region = tuple(int(v) for v in spec["region"])
+    if len(region) != 4 or region[2] < 1 or region[3] < 1:
+        raise ValueError(f"Trigger region must be [x, y, width, height], got {spec['region']}")
+    color = tuple(int(c) for c in spec["color"])
+    if len(color) != 3 or not all(0 <= c <= 255 for c in color):
+        raise ValueError(f"Trigger color must be [r, g, b] in 0-255, got {spec['color']}")
+    tolerance = int(spec["tolerance"])
+    if not 0 <= tolerance <= 255:
+        raise ValueError(f"Trigger tolerance must be between 0 and 255, got {tolerance}")
+    min_fraction = float(spec["min_fraction"])
+    if not 0 < min_fraction <= 1:
+        raise ValueError(f"Trigger min_fraction must be in (0, 1], got {min_fraction}")
+    downsample = int(spec["downsample"])
+    if downsample < 1:
+        raise ValueError(f"Trigger downsample must be at least 1, got {downsample}")
+    poll_interval_ms = float(spec["poll_interval_ms"])
+    if not poll_interval_ms > 0:
+        raise ValueError(f"Trigger poll interval must be positive, got {poll_interval_ms}")
+    source = spec["source"]
+    if source != "auto" and source not in FRAME_SOURCES:
+        raise ValueError(f"Unknown frame source: {source}")
+    return (region, color, tolerance, min_fraction, bool(spec["invert"]),
+            downsample, poll_interval_ms, source)
+
+
+class ColorCondition:
+    """Does at least min_fraction of the sampled pixels lie within tolerance of color?"""
+
+    def __init__(self, color, tolerance=16, min_fraction=0.5, invert=False):
+        self.color = tuple(int(c) for c in color)
+        self.tolerance = int(tolerance)
+        self.min_fraction = float(min_fraction)
+        self.invert = bool(invert)
+        self.np = None
+
+    def load_numpy(self):
+        """Use NumPy for the checks if it is installed; slow, so call it off the click path"""
+        try:
+            import numpy
+            self.np = numpy
+        except ImportError:
+            pass
+
+    def matches(self, frame):
+        """Check a frame; invert turns this into "does not match" """
+        if self.np is not None:
+            fraction = self._fraction_numpy(frame)
+        else:
+            fraction = self._fraction_python(frame)
+        return (fraction >= self.min_fraction) != self.invert
+
+    def _fraction_numpy(self, frame):
+        np = self.np
+        step, size = frame.step, frame.pixel_size
+        rows = np.frombuffer(frame.data, dtype=np.uint8, count=frame.height * frame.stride)
+        rows = rows.reshape(frame.height, frame.stride)[::step, :frame.width * size]
+        pixels = rows.reshape(rows.shape[0], frame.width, size)[:, ::step, list(frame.offsets)]
+        distance = np.abs(pixels.astype(np.int16) - np.array(self.color, dtype=np.int16))
+        return float((distance <= self.tolerance).all(axis=-1).mean())
+
+    def _fraction_python(self, frame):
+        data, step, size = frame.data, frame.step, frame.pixel_size
+        r_offset, g_offset, b_offset = frame.offsets
+        red, green, blue = self.color
+        tolerance = self.tolerance
+        matched = total = 0
+        for y in range(0, frame.height, step):
+            row = y * frame.stride
+            for i in range(row, row + frame.width * size, step * size):
+                total += 1
+                if (abs(data[i + r_offset] - red) <= tolerance
+                        and abs(data[i + g_offset] - green) <= tolerance
+                        and abs(data[i + b_offset] - blue) <= tolerance):
+                    matched += 1
+        return matched / total if total else 0.0
+
+
+class PixelTrigger:
+    """Polls a region on a background thread and tracks whether it matches"""
+
+    def __init__(self, source, region, condition, poll_interval_ms=5.0):
+        self.source = source
+        self.region = tuple(int(v) for v in region)
+        self.condition = condition
+        self.poll_interval = poll_interval_ms / 1000.0
+        self.active_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_data = None
+        # perf_counter time of the frame that last activated the trigger
+        self.activated_at = None
+        self.frame_count = 0
+        self.unchanged_count = 0
+        self.check_time = 0.0
+
+    @property
+    def active(self):
+        return self.active_event.is_set()
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        perf_counter = time.perf_counter
+        self.condition.load_numpy()
+        while not self.stop_event.is_set():
+            grabbed_at = perf_counter()
+            try:
+                frame = self.source.grab(self.region)
+            except Exception as e:
+                print(f"Error capturing trigger region: {e}")
+                self.active_event.clear()
+                self.stop_event.wait(1.0)
+                continue
+            self.frame_count += 1
+            if frame.data == self.last_data:
+                # Nothing changed, so neither did the result
+                self.unchanged_count += 1
+            else:
+                self.last_data = frame.data
+                start = perf_counter()
+                if self.condition.matches(frame):
+                    if not self.active_event.is_set():
+                        self.activated_at = grabbed_at
+                        self.active_event.set()
+                else:
+                    self.active_event.clear()
+                self.check_time += perf_counter() - start
+            self.stop_event.wait(self.poll_interval)
+
+    def wait_active(self, stop_event, deadline=None, poll=0.01):
+        """Block until the trigger fires; return False if stop_event is set first
+
+        Also returns False once the perf_counter time deadline passes. The
+        trigger event wakes the caller at once; poll only bounds how long a
+        stop request waits while the trigger is inactive.
+        """
+        perf_counter = time.perf_counter
+        while not stop_event.is_set():
+            timeout = poll
+            if deadline is not None:
+                timeout = min(poll, deadline - perf_counter())
+                if timeout <= 0:
+                    return False
+            if self.active_event.wait(timeout):
+                return True
+        return False
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        self.active_event.clear()
+
+    def get_status(self):
+        checked = self.frame_count - self.unchanged_count
+        return {
+            "active": self.active,
+            "frames": self.frame_count,
+            "unchanged_frames": self.unchanged_count,
+            "mean_check_us": self.check_time / checked * 1e6 if checked else 0.0
+        }
@@ -0,0 +1,99 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SpeedAutoClicker"))
+
+from timing import ClickScheduler
+
+
+def max_in_window(times, window):
+    """Return the largest number of times inside any half-open window
+
+    Times exactly one window apart are not counted together, allowing for
+    float rounding in the scheduler's arithmetic.
+    """
+    best = 0
+    start = 0
+    for end in range(len(times)):
+        while times[end] - times[start] >= window - 1e-9:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+def simulate(interval, max_clicks, window, cost=1, slots=2000, lateness=(0.0,)):
+    """Drive a scheduler on a simulated clock and return every click time
+
+    Each slot's clicks are posted late by the next value from lateness, one
+    after another, 10 us apart, like a burst.
+    """
+    scheduler = ClickScheduler(interval, policy="skip", max_lateness=1.0)
+    scheduler.start(0.0)
+    scheduler.set_limits(None, max_clicks, window, cost=cost)
+    now = 0.0
+    clicks = []
+    for slot in range(slots):
+        deadline = scheduler.next_deadline(now)
+        posted = max(now, deadline) + lateness[slot % len(lateness)]
+        for i in range(cost):
+            clicks.append(posted + i * 1e-5)
+        now = clicks[-1]
+        scheduler.advance(posted=now)
+    return clicks
+
+
+class RateLimitTest(unittest.TestCase):
+    def test_cap_holds_when_clicks_are_on_time(self):
+        clicks = simulate(0.001, 50, 0.1)
+        self.assertLessEqual(max_in_window(clicks, 0.1), 50)
+
+    def test_cap_holds_when_clicks_are_late(self):
+        # Alternately late and on time, which let a token bucket overshoot
+        clicks = simulate(0.001, 50, 0.1, lateness=(0.0, 0.004, 0.0, 0.0))
+        self.assertLessEqual(max_in_window(clicks, 0.1), 50)
+
+    def test_cap_holds_for_bursts(self):
+        clicks = simulate(0.001, 50, 0.1, cost=10, slots=500)
+        self.assertLessEqual(max_in_window(clicks, 0.1), 50)
+
+    def test_cap_is_reached(self):
+        clicks = simulate(0.001, 50, 0.1)
+        # 50 clicks 1 ms apart at the start of each 100 ms window
+        self.assertAlmostEqual(clicks[-1], 3.949, delta=1e-6)
+
+    def test_slot_larger_than_cap_is_rejected(self):
+        scheduler = ClickScheduler(0.001)
+        with self.assertRaises(ValueError):
+            scheduler.set_limits(None, 5, 0.1, cost=10)
+
+    def test_lowering_the_cap_keeps_recent_clicks(self):
+        scheduler = ClickScheduler(0.001, max_lateness=1.0)
+        scheduler.start(0.0)
+        scheduler.set_limits(None, 100, 1.0)
+        now = 0.0
+        for _ in range(20):
+            now = scheduler.next_deadline(now)
+            scheduler.advance(posted=now)
+        scheduler.set_limits(None, 10, 1.0)
+        # The last 10 clicks are within the window, so the next one waits
+        self.assertGreaterEqual(scheduler.next_deadline(now), 1.010)
+
+
+class DurationLimitTest(unittest.TestCase):
+    def test_no_deadline_after_the_end(self):
+        scheduler = ClickScheduler(0.01)
+        scheduler.start(0.0)
+        scheduler.set_limits(0.05)
+        deadlines = []
+        while True:
+            deadline = scheduler.next_deadline(deadlines[-1] if deadlines else 0.0)
+            if deadline is None:
+                break
+            deadlines.append(deadline)
+            scheduler.advance()
+        self.assertEqual(len(deadlines), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()